@@ -0,0 +1,95 @@
+import os
+import json
+import numpy as np
+
+PROFILES_FILE = os.path.join(os.path.expanduser("~"), ".cache", "vocal_correction", "latency_profiles.json")
+DEFAULT_OFFSET_SECONDS = 0.2  # the old hard-coded latency_offset
+MIN_CALIBRATION_CONFIDENCE = 0.5  # weaker chirp measurements are not stored
+
+
+def _mono(audio):
+    audio = np.asarray(audio, dtype=np.float32)
+    return audio.mean(axis=1) if audio.ndim > 1 else audio
+
+
+def estimate_offset(recorded, reference, sr, max_lag_seconds=1.0):
+    """
+    Find how many samples the recording lags behind the reference with an FFT-based
+    cross-correlation (O(n log n), cheap enough for every take and full songs).
+    :return: (lag_samples, confidence). A positive lag means the recording is late;
+    confidence is the normalized correlation at the peak (0..1).
+    """
+    recorded = _mono(recorded)
+    reference = _mono(reference)
+    if len(recorded) == 0 or len(reference) == 0:
+        return 0, 0.0
+
+    from scipy import signal
+
+    corr = signal.correlate(recorded, reference, mode="full", method="fft")
+    lags = signal.correlation_lags(len(recorded), len(reference), mode="full")
+
+    max_lag = int(max_lag_seconds * sr)
+    window = np.abs(lags) <= max_lag
+    corr, lags = corr[window], lags[window]
+
+    peak = int(np.argmax(np.abs(corr)))
+    norm = np.linalg.norm(recorded) * np.linalg.norm(reference)
+    confidence = float(np.abs(corr[peak]) / norm) if norm > 0 else 0.0
+    return int(lags[peak]), confidence
+
+
+def make_chirp(sr, duration=0.5, f0=200.0, f1=8000.0, silence=1.5):
+    """Calibration signal: a short log chirp with faded edges followed by silence."""
+    from scipy import signal
+
+    t = np.arange(int(duration * sr)) / sr
+    chirp = signal.chirp(t, f0=f0, t1=duration, f1=f1, method="logarithmic").astype(np.float32)
+    fade = min(len(chirp) // 10, int(0.01 * sr))
+    if fade:
+        ramp = np.linspace(0.0, 1.0, fade, dtype=np.float32)
+        chirp[:fade] *= ramp
+        chirp[-fade:] *= ramp[::-1]
+    return np.concatenate([0.5 * chirp, np.zeros(int(silence * sr), dtype=np.float32)])
+
+
+def shift_take(take, lag):
+    """Shift a recording by lag samples (positive = drop leading samples) keeping its length."""
+    shifted = np.zeros_like(take)
+    if lag >= 0:
+        shifted[:len(take) - lag] = take[lag:]
+    else:
+        shifted[-lag:] = take[:len(take) + lag]
+    return shifted
+
+
+# ---------------------
+# DEVICE PROFILES
+# ---------------------
+def load_profiles(path=PROFILES_FILE):
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def get_offset(device_key, sr, path=PROFILES_FILE):
+    """Stored latency offset in samples for a device, or the old 200 ms default."""
+    profile = load_profiles(path).get(device_key)
+    if profile is None:
+        return int(DEFAULT_OFFSET_SECONDS * sr)
+    return int(round(profile["offset_seconds"] * sr))
+
+
+def save_offset(device_key, offset_samples, sr, confidence, source, path=PROFILES_FILE):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    profiles = load_profiles(path)
+    profiles[device_key] = {
+        "offset_seconds": offset_samples / sr,
+        "confidence": confidence,
+        "source": source,
+    }
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(profiles, f, indent=2)
+    os.replace(tmp, path)
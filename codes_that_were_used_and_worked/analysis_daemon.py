@@ -0,0 +1,445 @@
+import os
+import sys
+import json
+import time
+import queue
+import socket
+import argparse
+import tempfile
+import threading
+import instrumentation
+from instrumentation import span, counter
+
+# Long-running process keeping Spleeter's Separator, the VoiceEncoder and the pitch engines
+# loaded, serving jobs over a Unix socket. Protocol: one JSON object per line each way.
+#   request:  {"id": 1, "op": "pitch", "args": {"path": "user_Do.wav", "engine": "yin"}}
+#   response: {"id": 1, "ok": true, "result": {...}, "queue_seconds": 0.0, "seconds": 0.03}
+#             {"id": 1, "ok": false, "error": "...", "busy": true}  (that job type's queue is full)
+# Jobs of one type wait in their own bounded queue and run on that type's worker threads,
+# so a long separation never holds up a speaker comparison. ping, stats and shutdown are
+# answered right away.
+SOCKET_ENV = "VOCAL_DAEMON_SOCKET"
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "vocal_daemon.sock")
+MAX_REQUEST_BYTES = 1024 * 1024
+
+CONCURRENCY = {"separate": 1, "embed": 1, "pitch": 4, "compare": 2}  # worker threads per job type
+QUEUE_SIZE = {"separate": 4, "embed": 16, "pitch": 64, "compare": 64}  # waiting jobs per type
+
+
+class DaemonError(RuntimeError):
+    """A job failed, or was rejected because its queue was full (busy=True)."""
+
+    def __init__(self, message, busy=False):
+        super().__init__(message)
+        self.busy = busy
+
+
+def socket_path(path=None):
+    return path or os.environ.get(SOCKET_ENV) or DEFAULT_SOCKET
+
+
+# ---------------------
+# WARM MODELS
+# ---------------------
+class WarmModels:
+    """Models and indexes loaded once and shared by every job of the daemon."""
+
+    def __init__(self, device=None):
+        self.device = device
+        self._lock = threading.Lock()
+        self._separator = None
+        self._indexes = {}  # enrolled path -> (file stamp, SpeakerIndex)
+
+    def separator(self):
+        with self._lock:
+            if self._separator is None:
+                from vocal_separation import get_separator
+                self._separator = get_separator()
+            return self._separator
+
+    def encoder(self):
+        from encoder_cache import get_encoder
+        return get_encoder(device=self.device)  # cached process-wide by encoder_cache
+
+    def index(self, enrolled):
+        """SpeakerIndex of a store, .npy directory or single .npy file, rebuilt when its files change."""
+        from embedding_store import EmbeddingStore, INDEX_FILE
+        from speaker_id import SpeakerIndex
+
+        store_index = os.path.join(enrolled, INDEX_FILE)
+        is_store = os.path.exists(store_index)
+        if is_store:
+            files = [store_index]  # rewritten by every append and delete
+        elif enrolled.endswith(".npy"):
+            files = [enrolled]
+        else:
+            # A directory's own mtime misses a .npy overwritten in place
+            files = sorted(os.path.join(enrolled, f) for f in os.listdir(enrolled) if f.endswith(".npy"))
+        stamp = tuple((os.path.basename(f), st.st_size, st.st_mtime_ns) for f, st in ((f, os.stat(f)) for f in files))
+        with self._lock:
+            cached = self._indexes.get(enrolled)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+
+        if is_store:
+            index = SpeakerIndex.from_store(EmbeddingStore(enrolled))
+        elif enrolled.endswith(".npy"):
+            index = SpeakerIndex.from_files([enrolled])
+        else:
+            index = SpeakerIndex.from_directory(enrolled)
+        with self._lock:
+            self._indexes[enrolled] = (stamp, index)
+        return index
+
+    def preload(self, ops):
+        """Load what the given job types need now instead of on their first request."""
+        import numpy as np
+
+        for op in ops:
+            with span("daemon.preload", op=op):
+                if op == "separate":
+                    self.separator()
+                elif op == "embed":
+                    self.encoder()
+                elif op == "pitch":
+                    # First call imports librosa and compiles pyin's numba kernels
+                    from pitch_engine import get_engine
+                    for engine in ("pyin", "yin"):
+                        get_engine(engine).estimate(np.zeros(22050, dtype=np.float32), 22050)
+            print(f"🔥 {op} ready")
+
+
+# ---------------------
+# JOBS
+# ---------------------
+def _separate(models, path, output):
+    """Vocals stem of path written to output (bounded memory, as download_and_process does for long tracks)."""
+    from vocal_separation import separate_streaming, SPLEETER_SR
+    frames = separate_streaming(path, output, models.separator())
+    return {"output": output, "seconds": frames / SPLEETER_SR}
+
+
+def _embed(models, paths):
+    """Voice embeddings of audio files, in one batched forward pass."""
+    import audio_loader
+    from encoder_cache import embed_batch
+    wavs = [audio_loader.load(path, sr=16000)[0] for path in paths]
+    embeddings = embed_batch(wavs, encoder=models.encoder(), verbose=False)
+    return {"embeddings": embeddings.tolist()}
+
+
+def _pitch(models, path, note=None, engine="pyin"):
+    from batch_analysis import analyze_file
+    return analyze_file(path, note, engine)
+
+
+def _compare(models, query, enrolled, top_k=5):
+    """
+    Best matches of query among the enrolled speakers.
+    :param query: embedding as a list of floats, a .npy path, or a speaker id of the store.
+    :param enrolled: embedding store directory, .npy directory or a single .npy file.
+    """
+    import numpy as np
+    if isinstance(query, list):
+        query = np.asarray(query, dtype=np.float32)
+    elif query.endswith(".npy"):
+        query = np.load(query)
+    else:
+        from embedding_store import EmbeddingStore
+        query = EmbeddingStore(enrolled).get(query)
+    matches = models.index(enrolled).identify(query, top_k=top_k)[0]
+    return {"matches": [m._asdict() for m in matches]}
+
+
+HANDLERS = {"separate": _separate, "embed": _embed, "pitch": _pitch, "compare": _compare}
+
+
+class Job:
+    def __init__(self, request_id, op, args, reply):
+        self.id = request_id
+        self.op = op
+        self.args = args
+        self.reply = reply
+        self.enqueued = time.perf_counter()
+        self.done = threading.Event()
+
+    def finish(self, response):
+        response["id"] = self.id
+        try:
+            self.reply(response)
+        finally:
+            self.done.set()
+
+
+class AnalysisDaemon:
+    """
+    Per-type bounded job queues drained by CONCURRENCY[op] worker threads, all
+    sharing one WarmModels.
+    """
+
+    def __init__(self, concurrency=None, queue_size=None, device=None):
+        self.models = WarmModels(device)
+        self.concurrency = dict(CONCURRENCY, **(concurrency or {}))
+        sizes = dict(QUEUE_SIZE, **(queue_size or {}))
+        self.queues = {op: queue.Queue(maxsize=sizes[op]) for op in HANDLERS}
+        self.stats = {op: {"completed": 0, "failed": 0, "rejected": 0, "running": 0, "seconds": 0.0}
+                      for op in HANDLERS}
+        self._stats_lock = threading.Lock()
+        self._workers = []
+
+    def start(self):
+        for op, workers in self.concurrency.items():
+            for i in range(workers):
+                worker = threading.Thread(target=self._work, args=(op,), name=f"{op}-{i}", daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def stop(self):
+        """Let queued jobs finish, then stop the workers."""
+        for op, workers in self.concurrency.items():
+            for _ in range(workers):
+                self.queues[op].put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+    def submit(self, job):
+        """Queue a job. Returns False (and counts a rejection) when its queue is full."""
+        try:
+            self.queues[job.op].put_nowait(job)
+            return True
+        except queue.Full:
+            with self._stats_lock:
+                self.stats[job.op]["rejected"] += 1
+            counter(f"daemon.{job.op}.rejected")
+            return False
+
+    def _work(self, op):
+        handler = HANDLERS[op]
+        jobs = self.queues[op]
+        while True:
+            job = jobs.get()
+            if job is None:
+                return
+            waited = time.perf_counter() - job.enqueued
+            with self._stats_lock:
+                self.stats[op]["running"] += 1
+            start = time.perf_counter()
+            try:
+                with span(f"daemon.{op}", queue_seconds=waited):
+                    result = handler(self.models, **job.args)
+                response = {"ok": True, "result": result}
+            except Exception as e:
+                response = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+            elapsed = time.perf_counter() - start
+            with self._stats_lock:
+                stats = self.stats[op]
+                stats["running"] -= 1
+                stats["completed" if response["ok"] else "failed"] += 1
+                stats["seconds"] += elapsed
+            response.update(queue_seconds=waited, seconds=elapsed)
+            job.finish(response)
+
+    def snapshot(self):
+        with self._stats_lock:
+            return {op: dict(s, queued=self.queues[op].qsize(), workers=self.concurrency[op])
+                    for op, s in self.stats.items()}
+
+
+# ---------------------
+# SERVER
+# ---------------------
+def _handler_class(daemon, server_ref):
+    import socketserver
+
+    class Handler(socketserver.StreamRequestHandler):
+        """One client connection: requests may be pipelined, responses come back as jobs finish."""
+
+        def handle(self):
+            write_lock = threading.Lock()
+            pending = []
+
+            def reply(response):
+                data = (json.dumps(response) + "\n").encode("utf-8")
+                with write_lock:
+                    try:
+                        self.wfile.write(data)
+                        self.wfile.flush()
+                    except OSError:
+                        pass  # client went away; the job still ran
+
+            while True:
+                line = self.rfile.readline(MAX_REQUEST_BYTES + 1)
+                if not line:
+                    break
+                if len(line) > MAX_REQUEST_BYTES:
+                    reply({"id": None, "ok": False, "error": "Request too large"})
+                    break
+                try:
+                    request = json.loads(line)
+                    request_id, op, args = request.get("id"), request["op"], request.get("args") or {}
+                except (ValueError, KeyError, AttributeError) as e:
+                    reply({"id": None, "ok": False, "error": f"Bad request: {e}"})
+                    continue
+
+                if op == "ping":
+                    reply({"id": request_id, "ok": True, "result": "pong"})
+                elif op == "stats":
+                    reply({"id": request_id, "ok": True, "result": daemon.snapshot()})
+                elif op == "shutdown":
+                    reply({"id": request_id, "ok": True, "result": "stopping"})
+                    threading.Thread(target=server_ref[0].shutdown).start()
+                elif op not in HANDLERS:
+                    reply({"id": request_id, "ok": False, "error": f"Unknown op: {op}"})
+                else:
+                    job = Job(request_id, op, args, reply)
+                    if daemon.submit(job):
+                        pending.append(job)
+                    else:
+                        reply({"id": request_id, "ok": False, "busy": True, "error": f"{op} queue is full"})
+
+            # Keep the connection open until this client's jobs have answered
+            for job in pending:
+                job.done.wait()
+
+    return Handler
+
+
+def _claim_socket(path):
+    """Remove a stale socket file left by a crashed daemon; refuse to start next to a live one."""
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+        return
+    finally:
+        probe.close()
+    raise RuntimeError(f"A daemon is already listening on {path}")
+
+
+def serve(path=None, preload=(), concurrency=None, queue_size=None, device=None, ready=None):
+    """
+    Run the daemon until a shutdown request or Ctrl+C.
+    :param preload: job types to warm up before accepting connections.
+    :param ready: optional threading.Event set once the socket accepts connections.
+    """
+    import socketserver
+
+    path = socket_path(path)
+    _claim_socket(path)
+    daemon = AnalysisDaemon(concurrency, queue_size, device)
+    daemon.models.preload(preload)
+    daemon.start()
+
+    server_ref = []
+
+    class Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+    # Local user only: the socket is created 0600, with no window where others could connect
+    old_umask = os.umask(0o177)
+    try:
+        server = Server(path, _handler_class(daemon, server_ref))
+    finally:
+        os.umask(old_umask)
+    server_ref.append(server)
+    print(f"🎧 Analysis daemon listening on {path}")
+    if ready is not None:
+        ready.set()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        daemon.stop()
+        if os.path.exists(path):
+            os.unlink(path)
+        print("👋 Analysis daemon stopped")
+    return daemon.snapshot()
+
+
+# ---------------------
+# CLIENT
+# ---------------------
+class DaemonClient:
+    """
+    Blocking client over one connection:
+        with DaemonClient() as client:
+            client.request("pitch", path="user_Do.wav", engine="yin")
+    """
+
+    def __init__(self, path=None, timeout=None):
+        self.path = socket_path(path)
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        self._sock.connect(self.path)
+        self._file = self._sock.makefile("rb")
+        self._next_id = 0
+
+    def request(self, op, **args):
+        """Send one request and wait for its result. Raises DaemonError on failure or when busy."""
+        self._next_id += 1
+        message = {"id": self._next_id, "op": op, "args": args}
+        self._sock.sendall((json.dumps(message) + "\n").encode("utf-8"))
+        while True:
+            line = self._file.readline()
+            if not line:
+                raise DaemonError("Daemon closed the connection")
+            response = json.loads(line)
+            if response.get("id") in (self._next_id, None):
+                break
+        if not response["ok"]:
+            raise DaemonError(response["error"], busy=response.get("busy", False))
+        return response["result"]
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Warm analysis daemon (separate, embed, pitch, compare) on a Unix socket.")
+    parser.add_argument("--socket", help=f"Socket path (default: ${SOCKET_ENV} or {DEFAULT_SOCKET})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = sub.add_parser("serve", help="Run the daemon")
+    serve_parser.add_argument("--preload", nargs="*", default=[], choices=sorted(HANDLERS),
+                              help="Job types to warm up before accepting requests")
+    serve_parser.add_argument("--device", help="Torch device for the voice encoder")
+    serve_parser.add_argument("--trace", help="Write per-job timings to this JSON lines file")
+
+    call_parser = sub.add_parser("call", help="Send one request and print the result")
+    call_parser.add_argument("op", choices=sorted(HANDLERS) + ["ping", "stats", "shutdown"])
+    call_parser.add_argument("args", nargs="?", default="{}", help='Job arguments as JSON, e.g. \'{"path": "a.wav"}\'')
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        if args.trace:
+            instrumentation.enable(args.trace, truncate=True)
+        serve(args.socket, preload=args.preload, device=args.device)
+        if instrumentation.is_enabled():
+            instrumentation.print_summary()
+        return
+
+    try:
+        with DaemonClient(args.socket) as client:
+            result = client.request(args.op, **json.loads(args.args))
+    except (OSError, DaemonError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+import time
+from types import SimpleNamespace
+import numpy as np
+import soundfile as sf
+
+# The recorders only use this small part of the sounddevice API, through a backend object:
+#   rec(frames, samplerate, channels, dtype) / wait() / play(data, samplerate)
+#   InputStream(...) / OutputStream(...) with start() / stop() / close()
+#   sleep(seconds), query_devices(kind), CallbackStop, realtime
+# SoundDeviceBackend forwards to the sound card; VirtualDevice replays files through the
+# same callbacks as fast as the CPU allows.
+
+
+class SoundDeviceBackend:
+    """The real sound card (sounddevice is imported on first use)."""
+
+    realtime = True
+
+    def __init__(self):
+        import sounddevice
+        self._sd = sounddevice
+        self.CallbackStop = sounddevice.CallbackStop
+
+    def rec(self, frames, samplerate, channels, dtype):
+        return self._sd.rec(frames, samplerate=samplerate, channels=channels, dtype=dtype)
+
+    def wait(self):
+        self._sd.wait()
+
+    def play(self, data, samplerate):
+        self._sd.play(data, samplerate=samplerate)
+
+    def InputStream(self, **kwargs):
+        return self._sd.InputStream(**kwargs)
+
+    def OutputStream(self, **kwargs):
+        return self._sd.OutputStream(**kwargs)
+
+    def query_devices(self, kind=None):
+        return self._sd.query_devices(kind=kind)
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+# ---------------------
+# VIRTUAL DEVICE
+# ---------------------
+class VirtualCallbackStop(Exception):
+    pass
+
+
+_NO_STATUS = SimpleNamespace(input_overflow=False, input_underflow=False,
+                             output_overflow=False, output_underflow=False)
+
+
+class _VirtualStream:
+    def __init__(self, device, kind, samplerate, channels, callback, blocksize=None, finished_callback=None, **_):
+        self.device = device
+        self.kind = kind
+        self.samplerate = samplerate
+        self.channels = channels
+        self.callback = callback
+        self.blocksize = blocksize or device.blocksize
+        self.finished_callback = finished_callback
+        self.active = False
+
+    def start(self):
+        if self.samplerate != self.device.samplerate:
+            raise ValueError(f"Virtual device runs at {self.device.samplerate} Hz, stream asked for {self.samplerate} Hz")
+        self.active = True
+        self.device._streams.append(self)
+
+    def _finish(self):
+        if self.active:
+            self.active = False
+            if self.finished_callback is not None:
+                self.finished_callback()
+
+    def stop(self):
+        self._finish()
+
+    def close(self):
+        self._finish()
+        if self in self.device._streams:
+            self.device._streams.remove(self)
+
+
+class VirtualDevice:
+    """
+    File-backed stand-in for the sound card. Microphone input comes from recorded takes,
+    playback goes to memory, and time only passes when sleep() is called: sleep(seconds)
+    runs the stream callbacks for that many seconds of audio, without waiting.
+    :param inputs: take(s) the "microphone" hears, as paths or arrays at samplerate. With a
+                   list, every rec() call or input stream uses the next take; a single take
+                   is used for all of them.
+    :param capture_output: keep everything played (play() and output streams) in self.played.
+    """
+
+    realtime = False
+    CallbackStop = VirtualCallbackStop
+
+    def __init__(self, inputs=None, samplerate=44100, blocksize=1024, capture_output=False, name="virtual"):
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.capture_output = capture_output
+        self.name = name
+        self._inputs = list(inputs) if isinstance(inputs, (list, tuple)) else [inputs]
+        self._next_input = 0
+        self._streams = []
+        self._source = None
+        self._source_pos = 0
+        self.played = []
+        self.clock = 0.0  # virtual seconds elapsed
+
+    # ---------------------
+    # INPUT SOURCES
+    # ---------------------
+    def _load(self, source):
+        if source is None:
+            return np.zeros((0, 1), dtype=np.float32)
+        if isinstance(source, str):
+            audio, sr = sf.read(source, dtype="float32", always_2d=True)
+            if sr != self.samplerate:
+                from audio_loader import resample
+                audio = resample(audio, sr, self.samplerate)
+            return audio
+        audio = np.asarray(source, dtype=np.float32)
+        return audio[:, None] if audio.ndim == 1 else audio
+
+    def _open_next_input(self):
+        index = min(self._next_input, len(self._inputs) - 1)
+        self._next_input += 1
+        self._source = self._load(self._inputs[index])
+        self._source_pos = 0
+
+    def _read_input(self, frames, channels):
+        """Next frames of the current take as float32 (frames, channels), silence past its end."""
+        out = np.zeros((frames, channels), dtype=np.float32)
+        chunk = self._source[self._source_pos:self._source_pos + frames]
+        self._source_pos += len(chunk)
+        if len(chunk):
+            if chunk.shape[1] != channels:
+                chunk = np.repeat(chunk.mean(axis=1, keepdims=True), channels, axis=1)
+            out[:len(chunk)] = chunk
+        return out
+
+    # ---------------------
+    # BLOCKING API
+    # ---------------------
+    def rec(self, frames, samplerate, channels, dtype):
+        if samplerate != self.samplerate:
+            raise ValueError(f"Virtual device runs at {self.samplerate} Hz, rec() asked for {samplerate} Hz")
+        self._open_next_input()
+        audio = self._read_input(frames, channels)
+        self.clock += frames / self.samplerate
+        if np.issubdtype(np.dtype(dtype), np.integer):
+            # soundfile decodes PCM by dividing by -min (32768 for int16): undo exactly that
+            info = np.iinfo(dtype)
+            return np.clip(np.round(audio * -float(info.min)), info.min, info.max).astype(dtype)
+        return audio.astype(dtype)
+
+    def wait(self):
+        pass
+
+    def play(self, data, samplerate):
+        if self.capture_output:
+            self.played.append(np.array(data, copy=True))
+
+    def query_devices(self, kind=None):
+        return {"name": self.name, "max_input_channels": 2, "max_output_channels": 2,
+                "default_samplerate": self.samplerate}
+
+    # ---------------------
+    # STREAMS
+    # ---------------------
+    def InputStream(self, **kwargs):
+        self._open_next_input()
+        return _VirtualStream(self, "input", **kwargs)
+
+    def OutputStream(self, **kwargs):
+        return _VirtualStream(self, "output", **kwargs)
+
+    def sleep(self, seconds):
+        """Run every active stream for `seconds` of audio, one block at a time."""
+        remaining = int(round(seconds * self.samplerate))
+        while remaining > 0 and any(s.active for s in self._streams):
+            frames = min(self.blocksize, remaining)
+            info = SimpleNamespace(currentTime=self.clock, inputBufferAdcTime=self.clock,
+                                   outputBufferDacTime=self.clock)
+            # Playback first, then the microphone block recorded while it played
+            for stream in [s for s in self._streams if s.active and s.kind == "output"]:
+                outdata = np.zeros((frames, stream.channels), dtype=np.float32)
+                try:
+                    stream.callback(outdata, frames, info, _NO_STATUS)
+                except VirtualCallbackStop:
+                    stream._finish()
+                if self.capture_output:
+                    self.played.append(outdata)
+            for stream in [s for s in self._streams if s.active and s.kind == "input"]:
+                try:
+                    stream.callback(self._read_input(frames, stream.channels), frames, info, _NO_STATUS)
+                except VirtualCallbackStop:
+                    stream._finish()
+            remaining -= frames
+            self.clock += frames / self.samplerate
+        self.clock += remaining / self.samplerate  # nothing left running: time just passes
+
+
+# ---------------------
+# PROCESS-WIDE BACKEND
+# ---------------------
+_backend = None
+
+
+def get_backend():
+    """The backend recorders use when none is passed in: the sound card unless set_backend() was called."""
+    global _backend
+    if _backend is None:
+        _backend = SoundDeviceBackend()
+    return _backend
+
+
+def set_backend(backend):
+    global _backend
+    _backend = backend
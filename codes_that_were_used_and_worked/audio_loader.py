@@ -0,0 +1,170 @@
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+import numpy as np
+import soundfile as sf
+from instrumentation import span
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # decoded + resampled audio kept in memory
+FILTER_HALF_LENGTH = 10  # polyphase filter taps per phase on each side, as in resample_poly
+
+Decoded = namedtuple("Decoded", ["audio", "sr", "subtype"])
+
+
+@lru_cache(maxsize=32)
+def resampling_filter(up, down):
+    """
+    Anti-aliasing FIR for an up/down polyphase resampler (the filter resample_poly
+    designs internally). Designing it costs more than filtering a short take, so
+    every rate pair is designed once per process.
+    """
+    from scipy.signal import firwin
+
+    max_rate = max(up, down)
+    h = firwin(2 * FILTER_HALF_LENGTH * max_rate + 1, 1.0 / max_rate, window=("kaiser", 5.0))
+    h.setflags(write=False)
+    return h
+
+
+def resample(audio, sr, target_sr):
+    """Polyphase resampling along the first axis with a cached filter."""
+    if sr == target_sr:
+        return audio
+    from scipy.signal import resample_poly
+
+    g = np.gcd(int(sr), int(target_sr))
+    up, down = int(target_sr) // g, int(sr) // g
+    return resample_poly(audio, up, down, axis=0, window=resampling_filter(up, down)).astype(np.float32)
+
+
+def _decode(path):
+    """Native-rate (frames, channels) float32; ffmpeg (through librosa) for what libsndfile can't read."""
+    try:
+        with sf.SoundFile(path) as f:
+            return Decoded(f.read(dtype="float32", always_2d=True), f.samplerate, f.subtype)
+    except RuntimeError:
+        import librosa
+        audio, sr = librosa.load(path, sr=None, mono=False)
+        audio = np.atleast_2d(audio).T
+        return Decoded(np.ascontiguousarray(audio, dtype=np.float32), sr, None)
+
+
+class AudioLoader:
+    """
+    Decode each file once and derive every requested rate/layout from that decode.
+    Entries (the native decode and every derived version) live in one LRU bounded by
+    max_bytes and are keyed by path + size + mtime, so a re-recorded take is decoded
+    again while an unchanged one never is.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.decodes = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _file_key(path):
+        stat = os.stat(path)
+        return os.path.abspath(path), stat.st_size, stat.st_mtime_ns
+
+    def _get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def _put(self, key, value, nbytes):
+        with self._lock:
+            if key in self._entries or nbytes > self.max_bytes:
+                return
+            self._entries[key] = (value, nbytes)
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def decode(self, path):
+        """Native decode as Decoded(audio (frames, channels) float32, sr, subtype)."""
+        key = self._file_key(path) + ("native",)
+        cached = self._get(key)
+        if cached is not None:
+            return cached[0]
+        with span("decode", bytes_read=os.path.getsize(path)) as s:
+            decoded = _decode(path)
+            s.add(audio_seconds=len(decoded.audio) / decoded.sr)
+        decoded.audio.setflags(write=False)
+        self.decodes += 1
+        self._put(key, decoded, decoded.audio.nbytes)
+        return decoded
+
+    def load(self, path, sr=None, mono=True):
+        """
+        Drop-in for librosa.load(path, sr=sr, mono=mono): returns (y, sr) with y
+        shaped (frames,) when mono and (channels, frames) otherwise. The returned
+        array is shared with the cache and read-only; copy it before editing.
+        """
+        key = self._file_key(path) + (sr, mono)
+        cached = self._get(key)
+        if cached is not None:
+            return cached[0]
+
+        decoded = self.decode(path)
+        audio = decoded.audio.mean(axis=1) if mono else decoded.audio
+        target_sr = sr or decoded.sr
+        if target_sr != decoded.sr:
+            with span("resample", audio_seconds=len(audio) / decoded.sr, rate=target_sr):
+                audio = resample(audio, decoded.sr, target_sr)
+        y = np.ascontiguousarray(audio if mono else audio.T, dtype=np.float32)
+        y.setflags(write=False)
+        self._put(key, (y, target_sr), y.nbytes)
+        return y, target_sr
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "decodes": self.decodes,
+                "evictions": self.evictions,
+            }
+
+
+# ---------------------
+# PROCESS-WIDE LOADER
+# ---------------------
+_loader = AudioLoader()
+
+
+def get_loader():
+    return _loader
+
+
+def load(path, sr=None, mono=True):
+    return _loader.load(path, sr, mono)
+
+
+def decode(path):
+    return _loader.decode(path)
+
+
+def stats():
+    return _loader.stats()
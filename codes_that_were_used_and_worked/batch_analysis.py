@@ -0,0 +1,136 @@
+import os
+import json
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from pitch_engine import ENGINES, get_engine
+import audio_loader
+from note_mapping import map_contour
+from instrumentation import span
+
+solfege_notes = {
+    'Do': 261.63,  # C4
+    'Re': 293.66,  # D4
+    'Mi': 329.63,  # E4
+    'Fa': 349.23,  # F4
+    'Sol': 392.00, # G4
+    'La': 440.00,  # A4
+    'Si': 493.88   # B4
+}
+
+
+def note_files(directory):
+    """(path, note) for every user_<note>.wav present in a recordings directory."""
+    files = []
+    for note in solfege_notes:
+        path = os.path.join(directory, f"user_{note}.wav")
+        if os.path.exists(path):
+            files.append((path, note))
+    return files
+
+
+def analyze_file(path, note=None, engine="pyin"):
+    """
+    Pitch analysis of one recording (pyin with the detect_pitch() settings by default).
+    :return: dict with median f0, mapped syllable and voiced ratio.
+    """
+    y, sr = audio_loader.load(path, sr=44100)
+    with span(f"pitch.{engine}", audio_seconds=len(y) / sr):
+        _, f0, voiced_flag = get_engine(engine).estimate(y, sr)
+
+    valid_f0 = f0[~np.isnan(f0)]
+    median = float(np.median(valid_f0)) if len(valid_f0) else None
+    # Per-frame notes: the syllable is the most frequent note over voiced frames,
+    # so an octave error on the median no longer changes it
+    contour = map_contour(f0)
+    voiced_notes = contour.solfege[contour.midi >= 0]
+    syllable = None
+    if len(voiced_notes):
+        labels, counts = np.unique(voiced_notes, return_counts=True)
+        syllable = str(labels[counts.argmax()])
+    cents = contour.cents[contour.solfege == syllable] if syllable else np.empty(0)
+
+    return {
+        "path": path,
+        "note": note,
+        "f0_median": median,
+        "syllable": syllable,
+        "cents_median": float(np.median(cents)) if len(cents) else None,
+        "voiced_ratio": float(np.mean(voiced_flag)) if len(voiced_flag) else 0.0,
+        "frames": int(len(f0)),
+        "engine": engine,
+    }
+
+
+def _analyze_job(job):
+    path, note, engine = job
+    try:
+        return analyze_file(path, note, engine)
+    except Exception as e:
+        return {"path": path, "note": note, "error": str(e)}
+
+
+def analyze_files(jobs, workers=None, chunksize=None, engine="pyin"):
+    """
+    Analyze (path, note) jobs across a process pool, returning results in job order.
+    Jobs are handed out in chunks so each worker pays the IPC round trip once per
+    chunk rather than once per file.
+    """
+    jobs = [(path, note, engine) for path, note in jobs]
+    if not jobs:
+        return []
+    workers = workers or os.cpu_count() or 1
+    if chunksize is None:
+        chunksize = max(1, len(jobs) // (4 * workers))
+    if workers == 1:
+        return [_analyze_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        return list(pool.map(_analyze_job, jobs, chunksize=chunksize))
+
+
+def analyze_directory(root, workers=None, chunksize=None, engine="pyin"):
+    """
+    Analyze every user's recordings below root (any folder holding user_<note>.wav files).
+    All files go into one pool so every core stays busy across users.
+    :return: dict of user folder (relative to root) -> list of results.
+    """
+    jobs, owners = [], []
+    for folder, _, _ in os.walk(root):
+        for job in note_files(folder):
+            jobs.append(job)
+            owners.append(os.path.relpath(folder, root))
+
+    by_user = {}
+    for owner, result in zip(owners, analyze_files(jobs, workers, chunksize, engine)):
+        by_user.setdefault(owner, []).append(result)
+    return by_user
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch pitch analysis of solfège recordings.")
+    parser.add_argument("root", help="Recordings folder, or an archive with one folder per user")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--chunksize", type=int, default=None)
+    parser.add_argument("--engine", default="pyin", choices=sorted(ENGINES), help="Pitch backend")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args(argv)
+
+    results = analyze_directory(args.root, args.workers, args.chunksize, args.engine)
+    for user, notes in results.items():
+        print(f"\n🎤 {user}")
+        for r in notes:
+            if r.get("error"):
+                print(f"  {r['note']}: ❌ {r['error']}")
+            elif r["f0_median"] is None:
+                print(f"  {r['note']}: No pitch detected.")
+            else:
+                print(f"  {r['note']}: {r['f0_median']:.2f} Hz -> {r['syllable']} (voiced {100 * r['voiced_ratio']:.0f}%)")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Results saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import soundfile as sf
+import audio_loader
+from enrollment_audio import enrollment_layout, assemble_pydub, combine
+from benchmark_suite import make_fixtures, NOTES, SAMPLE_RATE
+
+TAKES = [7, 50, 200]  # note takes per session; 7 is one solfège pass
+FORMATS = [(44100, 1), (48000, 2), (16000, 1)]  # (sample rate, channels) checked for identical output
+
+
+def make_session(directory, takes, sr=SAMPLE_RATE, channels=1):
+    """
+    The benchmark_suite enrollment fixtures, with the solfège takes copied under new
+    names until there are `takes` of them (distinct files, so every take is decoded).
+    """
+    make_fixtures(directory, sr, channels=channels)
+    recordings = os.path.join(directory, "recordings")
+    notes = [os.path.join(recordings, f"user_{note}.wav") for note in NOTES]
+    paths = []
+    for i in range(takes):
+        path = notes[i % len(notes)]
+        if i >= len(notes):
+            path = shutil.copy(path, os.path.join(recordings, f"user_{i}.wav"))
+        paths.append(path)
+    return paths, os.path.join(recordings, "sentence.wav")
+
+
+def time_pydub(layout, output_path):
+    start = time.perf_counter()
+    assemble_pydub(layout).export(output_path, format="wav")
+    return time.perf_counter() - start
+
+
+def time_numpy(layout, output_path):
+    audio_loader.get_loader().clear()  # count the decode as pydub does
+    start = time.perf_counter()
+    combine(layout, output_path)
+    return time.perf_counter() - start
+
+
+def same_bytes(a, b):
+    with open(a, "rb") as fa, open(b, "rb") as fb:
+        return fa.read() == fb.read()
+
+
+def main():
+    takes_list = [int(n) for n in sys.argv[1:]] or TAKES
+    workdir = tempfile.mkdtemp(prefix="vocal_bench_")
+    try:
+        print("Identical output check:")
+        for sr, channels in FORMATS:
+            directory = tempfile.mkdtemp(dir=workdir)
+            layout = enrollment_layout(*make_session(directory, 7, sr, channels))
+            time_pydub(layout, os.path.join(directory, "pydub.wav"))
+            time_numpy(layout, os.path.join(directory, "numpy.wav"))
+            same = same_bytes(os.path.join(directory, "pydub.wav"), os.path.join(directory, "numpy.wav"))
+            print(f"  {sr} Hz, {channels} ch: {'✅ identical' if same else '❌ DIFFERENT'}")
+
+        print(f"\n{'takes':>6} {'audio (s)':>10} {'pydub (s)':>10} {'numpy (s)':>10} {'speedup':>8}")
+        for takes in takes_list:
+            directory = tempfile.mkdtemp(dir=workdir)
+            layout = enrollment_layout(*make_session(directory, takes))
+            pydub_seconds = time_pydub(layout, os.path.join(directory, "pydub.wav"))
+            numpy_seconds = time_numpy(layout, os.path.join(directory, "numpy.wav"))
+            audio = sf.info(os.path.join(directory, "numpy.wav")).duration
+            print(f"{takes:>6} {audio:>10.0f} {pydub_seconds:>10.2f} {numpy_seconds:>10.2f} {pydub_seconds / numpy_seconds:>7.1f}x")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
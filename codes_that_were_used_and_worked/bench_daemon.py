@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+import subprocess
+import numpy as np
+from analysis_daemon import serve, DaemonClient
+from benchmark_suite import make_fixtures
+
+REQUESTS = 10
+ENGINES = ["yin", "pyin"]
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def cold_request(path, engine):
+    """One analysis in a fresh interpreter, which is what every CLI invocation pays."""
+    code = f"import batch_analysis; batch_analysis.analyze_file({path!r}, None, {engine!r})"
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=HERE, check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def bench(take, socket_file, requests):
+    """Cold and warm timings of a 3 s note take (one record_note() take) per engine."""
+    ready = threading.Event()
+    server = threading.Thread(target=serve, args=(socket_file,), kwargs={"preload": ["pitch"], "ready": ready})
+    server.start()
+    ready.wait()
+
+    print(f"\n{'engine':<8} {'cold (s)':>9} {'warm first (s)':>15} {'warm mean (s)':>14} {'speedup':>8}")
+    try:
+        with DaemonClient(socket_file) as client:
+            for engine in ENGINES:
+                cold = np.mean([cold_request(take, engine) for _ in range(3)])
+                times = []
+                for _ in range(requests):
+                    start = time.perf_counter()
+                    client.request("pitch", path=take, engine=engine)
+                    times.append(time.perf_counter() - start)
+                warm = np.mean(times[1:]) if len(times) > 1 else times[0]
+                print(f"{engine:<8} {cold:>9.3f} {times[0]:>15.3f} {warm:>14.4f} {cold / warm:>7.0f}x")
+    finally:
+        # Also after a failed request, or join() would wait forever
+        with DaemonClient(socket_file) as client:
+            client.request("shutdown")
+        server.join()
+
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else REQUESTS
+    workdir = tempfile.mkdtemp(prefix="vocal_bench_")
+    try:
+        make_fixtures(workdir)
+        bench(os.path.join(workdir, "recordings", "user_Do.wav"), os.path.join(workdir, "daemon.sock"), requests)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
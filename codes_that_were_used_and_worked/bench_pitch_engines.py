@@ -0,0 +1,117 @@
+import os
+import json
+import time
+import argparse
+import numpy as np
+from pitch_engine import ENGINES, get_engine
+
+SAMPLE_RATE = 44100
+GROSS_ERROR = 0.2  # an estimate more than 20% away from the truth is a gross error
+
+
+def synthetic_set(sr=SAMPLE_RATE, duration=2.0, seed=0):
+    """(label, signal, true f0) triples: pure librosa tones plus harder sung-like variants."""
+    import librosa
+
+    rng = np.random.default_rng(seed)
+    signals = []
+    for midi in range(48, 85, 3):  # C3..C6
+        f0 = librosa.midi_to_hz(midi)
+        tone = librosa.tone(f0, sr=sr, duration=duration)
+        signals.append((f"tone {f0:.0f}Hz", tone, f0))
+
+        # Harmonics with a weak fundamental, vibrato-free, plus noise: where octave errors happen
+        t = np.arange(len(tone)) / sr
+        rich = sum(a * np.sin(2 * np.pi * k * f0 * t) for k, a in [(1, 0.3), (2, 0.6), (3, 0.4), (4, 0.2)])
+        rich = rich + 0.05 * rng.standard_normal(len(t))
+        signals.append((f"harmonic {f0:.0f}Hz", rich.astype(np.float32), f0))
+    return signals
+
+
+def gross_error_rate(f0, truth):
+    """Share of frames (all frames are voiced in the synthetic set) unvoiced or >20% off."""
+    if len(f0) == 0:
+        return 1.0
+    wrong = np.isnan(f0) | (np.abs(f0 - truth) > GROSS_ERROR * truth)
+    return float(np.mean(wrong))
+
+
+def run_synthetic(engines, sr=SAMPLE_RATE):
+    signals = synthetic_set(sr)
+    audio_seconds = sum(len(y) for _, y, _ in signals) / sr
+    results = {}
+    for name in engines:
+        engine = get_engine(name)
+        engine.estimate(signals[0][1], sr)  # warm-up (numba/FFT plans)
+        errors = []
+        start = time.perf_counter()
+        for _, y, truth in signals:
+            _, f0, _ = engine.estimate(y, sr)
+            # Ignore the edge frames that only partly overlap the signal
+            errors.append(gross_error_rate(f0[2:-2], truth))
+        wall = time.perf_counter() - start
+        results[name] = {
+            "gross_error_rate": float(np.mean(errors)),
+            "audio_seconds_per_second": audio_seconds / wall,
+            "wall_seconds": wall,
+        }
+    return results
+
+
+def run_recordings(engines, directory, reference="pyin"):
+    """On real takes there is no ground truth: report agreement of each engine with pyin."""
+    import librosa
+
+    files = sorted(f for f in os.listdir(directory) if f.startswith("user_") and f.endswith(".wav"))
+    if not files:
+        return {}
+    takes = [librosa.load(os.path.join(directory, f), sr=SAMPLE_RATE)[0] for f in files]
+    audio_seconds = sum(len(y) for y in takes) / SAMPLE_RATE
+    medians = {}
+    results = {}
+    for name in [reference] + [e for e in engines if e != reference]:
+        engine = get_engine(name)
+        start = time.perf_counter()
+        medians[name] = [engine.median_pitch(y, SAMPLE_RATE) for y in takes]
+        wall = time.perf_counter() - start
+        agree = [
+            m is not None and r is not None and abs(m - r) <= GROSS_ERROR * r
+            for m, r in zip(medians[name], medians[reference])
+        ]
+        results[name] = {
+            "agreement_with_" + reference: float(np.mean(agree)),
+            "audio_seconds_per_second": audio_seconds / wall,
+        }
+    return results
+
+
+def print_table(title, results):
+    print(f"\n=== {title} ===")
+    for name, metrics in results.items():
+        print(f"{name:<10} " + "   ".join(f"{k} {v:.3f}" for k, v in metrics.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy/speed benchmark of the pitch engines.")
+    parser.add_argument("--engines", nargs="+", default=sorted(ENGINES), choices=sorted(ENGINES))
+    parser.add_argument("--recordings", default=os.path.join(os.getcwd(), "recordings"),
+                        help="Folder with user_<note>.wav takes")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    report = {"synthetic": run_synthetic(args.engines)}
+    print_table("Synthetic tones (gross error > 20%)", report["synthetic"])
+
+    if os.path.isdir(args.recordings):
+        report["recordings"] = run_recordings(args.engines, args.recordings)
+        if report["recordings"]:
+            print_table(f"Recordings in {args.recordings}", report["recordings"])
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Results saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+from playback_buffer import prepare_playback_buffer, fill_from, fill_from_planar
+
+SAMPLE_RATE = 44100
+DURATION = 20  # seconds, same as LiveVocalRecorder
+BLOCK_SIZES = [256, 512, 1024]
+
+
+def run_callbacks(fill, source, n_frames, blocksize):
+    """Drive one full pass of output callbacks and time each of them."""
+    outdata = np.empty((blocksize, 2), dtype=np.float32)
+    timings = []
+    position = 0
+    while position < n_frames:
+        start = time.perf_counter()
+        position += fill(source, position, outdata)
+        timings.append(time.perf_counter() - start)
+    return np.array(timings)
+
+
+def summarize(name, timings, blocksize):
+    budget = blocksize / SAMPLE_RATE
+    # A callback that eats more than half of its block period risks an underrun on a real device
+    underruns = int(np.sum(timings > 0.5 * budget))
+    print(f"{name:<22} mean {1e6 * timings.mean():7.2f} us   p99 {1e6 * np.percentile(timings, 99):7.2f} us   "
+          f"max {1e6 * timings.max():8.2f} us   underrun risk {underruns}/{len(timings)}")
+
+
+def main():
+    duration = float(sys.argv[1]) if len(sys.argv) > 1 else DURATION
+    n_frames = int(duration * SAMPLE_RATE)
+    # Same layout librosa.load(mono=False) returns: (2, N) float32
+    song_audio = np.random.default_rng(0).uniform(-0.5, 0.5, (2, n_frames)).astype(np.float32)
+
+    interleaved = prepare_playback_buffer(song_audio)
+    cache_path = os.path.join(tempfile.mkdtemp(), "playback.f32")
+    mapped = prepare_playback_buffer(song_audio, cache_path)
+
+    print(f"🎧 Output callback micro-benchmark, {duration:.0f}s stereo at {SAMPLE_RATE} Hz")
+    for blocksize in BLOCK_SIZES:
+        print(f"\n--- blocksize {blocksize} (budget {1000 * blocksize / SAMPLE_RATE:.2f} ms) ---")
+        summarize("planar (2, N) + .T", run_callbacks(fill_from_planar, song_audio, n_frames, blocksize), blocksize)
+        summarize("interleaved (N, 2)", run_callbacks(fill_from, interleaved, n_frames, blocksize), blocksize)
+        summarize("interleaved memmap", run_callbacks(fill_from, mapped, n_frames, blocksize), blocksize)
+
+    del mapped
+    os.remove(cache_path)
+
+
+if __name__ == "__main__":
+    main()
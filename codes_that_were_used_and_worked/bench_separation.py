@@ -0,0 +1,68 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import subprocess
+import numpy as np
+import soundfile as sf
+from instrumentation import peak_rss_mb
+
+DURATIONS = [60, 300, 900]  # seconds of synthetic audio
+SAMPLE_RATE = 44100
+
+
+def make_track(path, seconds, sr=SAMPLE_RATE):
+    """Write a synthetic stereo track (a sung-like tone over noise) minute by minute."""
+    rng = np.random.default_rng(0)
+    with sf.SoundFile(path, "w", samplerate=sr, channels=2, subtype="PCM_16") as f:
+        for start in range(0, seconds, 60):
+            t = np.arange(int(min(60, seconds - start) * sr)) / sr + start
+            voice = 0.3 * np.sin(2 * np.pi * (220 + 50 * np.sin(2 * np.pi * 0.2 * t)) * t)
+            noise = 0.1 * rng.standard_normal(len(t))
+            f.write(np.column_stack([voice + noise, voice - noise]).astype(np.float32))
+
+
+def child(mode, input_path, output_dir):
+    """Run one separation in this (fresh) process and print its measurements as JSON."""
+    from vocal_separation import get_separator, separate_streaming
+
+    separator = get_separator()
+    rss_before = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "whole":
+        # duration: separate_to_file stops after 600s by default
+        separator.separate_to_file(input_path, output_dir, duration=sf.info(input_path).duration + 1)
+    else:
+        separate_streaming(input_path, os.path.join(output_dir, "vocals.wav"), separator)
+    wall = time.perf_counter() - start
+    print(json.dumps({"mode": mode, "wall_seconds": wall, "peak_rss_mb": peak_rss_mb(), "model_rss_mb": rss_before}))
+
+
+def main():
+    durations = [int(d) for d in sys.argv[1:]] or DURATIONS
+    workdir = tempfile.mkdtemp()
+    print(f"{'duration':>9} {'mode':>10} {'wall (s)':>9} {'x realtime':>10} {'peak RSS (MB)':>14}")
+    for seconds in durations:
+        track = os.path.join(workdir, f"track_{seconds}s.wav")
+        make_track(track, seconds)
+        for mode in ("whole", "streaming"):
+            out = tempfile.mkdtemp(dir=workdir)
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--child", mode, track, out],
+                capture_output=True, text=True
+            )
+            if proc.returncode != 0:
+                print(f"{seconds:>8}s {mode:>10}   failed: {proc.stderr.strip().splitlines()[-1:]}")
+                continue
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            rss = result["peak_rss_mb"]
+            print(f"{seconds:>8}s {mode:>10} {result['wall_seconds']:>9.1f} "
+                  f"{seconds / result['wall_seconds']:>10.1f} {rss if rss is None else round(rss):>14}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(*sys.argv[2:5])
+    else:
+        main()
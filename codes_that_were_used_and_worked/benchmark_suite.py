@@ -0,0 +1,262 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import subprocess
+import importlib.util
+from functools import partial
+import numpy as np
+import soundfile as sf
+from instrumentation import peak_rss_mb
+
+SAMPLE_RATE = 44100
+NOTE_SECONDS = 3
+SENTENCE_SECONDS = 10
+SONG_SECONDS = 30
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EMBEDDINGS_DIR = os.path.join(REPO_ROOT, "test", "voice_embeddings", "testing_if_same_voice")
+
+# Same frequencies as solfege_notes in voice_embedding_2.py
+NOTES = {'Do': 261.63, 'Re': 293.66, 'Mi': 329.63, 'Fa': 349.23, 'Sol': 392.00, 'La': 440.00, 'Si': 493.88}
+
+
+# ---------------------
+# FIXTURES
+# ---------------------
+def make_fixtures(workdir, sr=SAMPLE_RATE, seed=0, channels=1):
+    """
+    Synthetic enrollment session in workdir: recordings/user_<note>.wav (tones with
+    vibrato-free harmonics and noise), recordings/sentence.wav (chirp over noise),
+    song.wav (stereo) and take.wav (a slightly flat mono take of the song's melody).
+    :param channels: channel count of the recordings
+    """
+    import librosa
+
+    rng = np.random.default_rng(seed)
+    recordings = os.path.join(workdir, "recordings")
+    os.makedirs(recordings, exist_ok=True)
+    for note, freq in NOTES.items():
+        tone = librosa.tone(freq, sr=sr, duration=NOTE_SECONDS) * 0.4
+        tone += 0.2 * librosa.tone(2 * freq, sr=sr, duration=NOTE_SECONDS)
+        tone = tone[:, None] + 0.02 * rng.standard_normal((len(tone), channels))
+        sf.write(os.path.join(recordings, f"user_{note}.wav"), (tone * 32767).astype(np.int16), sr)
+
+    sentence = librosa.chirp(fmin=110, fmax=440, sr=sr, duration=SENTENCE_SECONDS) * 0.3
+    sentence = sentence[:, None] + 0.05 * rng.standard_normal((len(sentence), channels))
+    sf.write(os.path.join(recordings, "sentence.wav"), (sentence * 32767).astype(np.int16), sr)
+
+    # Song: a melody stepping through the notes every half second, plus accompaniment noise
+    t = np.arange(SONG_SECONDS * sr) / sr
+    freqs = np.array(list(NOTES.values()))[(t * 2).astype(int) % len(NOTES)]
+    melody = 0.4 * np.sin(2 * np.pi * np.cumsum(freqs) / sr)
+    noise = 0.05 * rng.standard_normal((len(t), 2))
+    sf.write(os.path.join(workdir, "song.wav"), (melody[:, None] + noise).astype(np.float32), sr, subtype="PCM_16")
+    take = 0.4 * np.sin(2 * np.pi * np.cumsum(freqs * 2 ** (-20 / 1200)) / sr) + 0.02 * rng.standard_normal(len(t))
+    sf.write(os.path.join(workdir, "take.wav"), take.astype(np.float32), sr, subtype="PCM_16")
+
+
+def _recordings(workdir):
+    return [os.path.join(workdir, "recordings", f"user_{note}.wav") for note in NOTES]
+
+
+# ---------------------
+# BENCHMARKS
+# Each takes the fixture dir and returns (run, audio_seconds, items); only run() is timed.
+# ---------------------
+def _detect_pitch(engine, workdir):
+    import audio_loader
+    from voice_embedding_2 import detect_pitch
+
+    paths = _recordings(workdir)
+
+    def run():
+        audio_loader.get_loader().clear()  # time the decode too
+        for path in paths:
+            detect_pitch(path, engine)
+    return run, len(paths) * NOTE_SECONDS, len(paths)
+
+
+def _combine_audio(workdir):
+    from voice_embedding_2 import combine_audio
+    return combine_audio, len(NOTES) * NOTE_SECONDS + SENTENCE_SECONDS, len(NOTES) + 1
+
+
+def _generate_embedding(workdir):
+    from voice_embedding_2 import combine_audio, generate_embedding, combined_audio_file
+    from encoder_cache import get_encoder
+
+    combine_audio()
+    get_encoder()  # model load is not part of the measurement
+    return generate_embedding, sf.info(combined_audio_file).duration, 1
+
+
+def _similarity(workdir, queries=10000, seed=0):
+    """Pairwise checks over the checked-in embeddings plus a batched 1:N identification."""
+    from speaker_id import SpeakerIndex, decide
+
+    index = SpeakerIndex.from_directory(EMBEDDINGS_DIR)
+    rng = np.random.default_rng(seed)
+    noisy = index.matrix[rng.integers(len(index), size=queries)]
+    noisy = noisy + 0.05 * rng.standard_normal(noisy.shape)
+
+    def run():
+        e = index.matrix
+        similarity = e @ e.T
+        distance = np.sqrt(np.maximum(2 - 2 * similarity, 0))
+        for i in range(len(e)):
+            for j in range(i + 1, len(e)):
+                decide(similarity[i, j], distance[i, j])
+        index.identify(noisy, top_k=3)
+    return run, 0, queries + len(index) * (len(index) - 1) // 2
+
+
+def _shorten_song(workdir, duration=20):
+    # The file name has a space, so it can only be loaded by path
+    spec = importlib.util.spec_from_file_location(
+        "shorten_song", os.path.join(os.path.dirname(os.path.abspath(__file__)), "shorten song.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    source = os.path.join(workdir, "song.wav")
+    target = os.path.join(workdir, "song_short.wav")
+
+    def run():
+        shutil.copyfile(source, target)
+        module.shorten_song(target, duration)
+    return run, duration, 1
+
+
+def _recorder_replay(workdir):
+    """A full LiveVocalRecorder session with take.wav as the microphone, on the virtual device."""
+    from record_perfect import LiveVocalRecorder
+    from audio_io import VirtualDevice
+
+    recorder = LiveVocalRecorder(os.path.join(workdir, "song.wav"), cache_dir=os.path.join(workdir, "decoded"),
+                                 audio=VirtualDevice(os.path.join(workdir, "take.wav")))
+    output_path = os.path.join(workdir, "replayed_take.wav")
+
+    def run():
+        recorder._run_session(output_path, skip_frames=0, max_frames=len(recorder.song_frames))
+    return run, recorder.duration, 1
+
+
+BENCHMARKS = {
+    "detect_pitch_pyin": partial(_detect_pitch, "pyin"),
+    "detect_pitch_yin": partial(_detect_pitch, "yin"),
+    "detect_pitch_piptrack": partial(_detect_pitch, "piptrack"),
+    "combine_audio": _combine_audio,
+    "generate_embedding": _generate_embedding,
+    "similarity": _similarity,
+    "shorten_song": _shorten_song,
+    "recorder_replay": _recorder_replay,
+}
+
+
+# ---------------------
+# RUNNER
+# ---------------------
+def child(name, workdir):
+    """Run one benchmark in this (fresh) process and print its measurements as JSON."""
+    os.chdir(workdir)  # voice_embedding_2 resolves recordings/ from the working directory
+    start = time.perf_counter()
+    run, audio_seconds, items = BENCHMARKS[name](workdir)
+    setup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    run()
+    wall = time.perf_counter() - start
+    print(json.dumps({
+        "wall_seconds": wall,
+        "setup_seconds": setup,
+        "peak_rss_mb": peak_rss_mb(),
+        "audio_seconds": audio_seconds,
+        "audio_seconds_per_second": audio_seconds / wall if audio_seconds else None,
+        "items": items,
+        "items_per_second": items / wall,
+    }))
+
+
+def run_benchmark(name, workdir):
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", name, workdir],
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines()
+        return {"error": lines[-1] if lines else f"exit code {proc.returncode}"}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True,
+                              text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_results(results, baseline=None):
+    print(f"\n{'benchmark':<24} {'wall (s)':>9} {'audio s/s':>10} {'items/s':>10} {'peak RSS (MB)':>14} {'vs baseline':>12}")
+    for name, r in results.items():
+        if "error" in r:
+            print(f"{name:<24} ❌ {r['error']}")
+            continue
+        speed = f"{r['audio_seconds_per_second']:.1f}" if r["audio_seconds_per_second"] else "-"
+        rss = f"{r['peak_rss_mb']:.0f}" if r["peak_rss_mb"] is not None else "-"
+        change = ""
+        old = (baseline or {}).get(name)
+        if old and "wall_seconds" in old:
+            change = f"{old['wall_seconds'] / r['wall_seconds']:.2f}x"
+        print(f"{name:<24} {r['wall_seconds']:>9.3f} {speed:>10} {r['items_per_second']:>10.1f} {rss:>14} {change:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless benchmarks of the audio pipelines on synthetic fixtures.")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Run only these benchmarks")
+    parser.add_argument("--json", default="benchmark_results.json", help="Where to write the results")
+    parser.add_argument("--compare", help="Earlier results JSON to compare wall times against")
+    parser.add_argument("--keep", action="store_true", help="Keep the fixture directory")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="vocal_bench_")
+    print(f"🎧 Generating fixtures in {workdir}")
+    # In a child too: peak RSS survives fork/exec on Linux, so the parent must stay small
+    subprocess.run([sys.executable, os.path.abspath(__file__), "--fixtures", workdir], check=True)
+
+    results = {}
+    try:
+        for name in args.only or BENCHMARKS:
+            print(f"⏱️ {name}...")
+            results[name] = run_benchmark(name, workdir)
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    print_results(results, baseline)
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "results": results,
+    }
+    with open(args.json, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Results saved to {args.json}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        child(*sys.argv[2:4])
+    elif len(sys.argv) > 1 and sys.argv[1] == "--fixtures":
+        make_fixtures(sys.argv[2])
+    else:
+        main()
@@ -1,31 +1,40 @@
+import sys
 import numpy as np
-from scipy.spatial.distance import cosine, euclidean
-
-# Load embeddings
-embedding1 = np.load(r"VocalCorrection-App\ml_models\voice_id\me1.npy")
-embedding2 = np.load(r"VocalCorrection-App\ml_models\voice_id\dako.npy")
-
-# Normalize embeddings for better accuracy
-embedding1 = embedding1 / np.linalg.norm(embedding1)
-embedding2 = embedding2 / np.linalg.norm(embedding2)
-
-# Compute similarity scores
-similarity = 1 - cosine(embedding1, embedding2)
-distance = euclidean(embedding1, embedding2)
-
-# Print results
-print(f"🔍 Speaker Similarity Score: {similarity:.4f}")
-print(f"📏 Euclidean Distance: {distance:.4f}")
-
-# Thresholds
-same_speaker_threshold = 0.85  # High confidence threshold
-uncertain_threshold = 0.75  # Gray area
-distance_threshold = 0.7  # Lower = more similar
-
-# Decision logic using both similarity and distance
-if similarity >= same_speaker_threshold and distance < distance_threshold:
-    print("✅ Same speaker detected with high confidence!")
-elif similarity >= uncertain_threshold and distance < 1.0:
-    print("⚠️ Possible same speaker, but needs further verification.")
-else:
-    print("❌ Different speakers.")
+from speaker_id import decide, SAME, UNCERTAIN
+
+EMBEDDING_1 = r"VocalCorrection-App\ml_models\voice_id\me1.npy"
+EMBEDDING_2 = r"VocalCorrection-App\ml_models\voice_id\dako.npy"
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    path1, path2 = argv[:2] if len(argv) >= 2 else (EMBEDDING_1, EMBEDDING_2)
+
+    # Load embeddings
+    embedding1 = np.load(path1)
+    embedding2 = np.load(path2)
+
+    # Normalize embeddings for better accuracy
+    embedding1 = embedding1 / np.linalg.norm(embedding1)
+    embedding2 = embedding2 / np.linalg.norm(embedding2)
+
+    # Compute similarity scores (plain numpy: scipy.spatial alone takes longer to import than this whole script)
+    similarity = float(np.dot(embedding1, embedding2))
+    distance = float(np.linalg.norm(embedding1 - embedding2))
+
+    # Print results
+    print(f"🔍 Speaker Similarity Score: {similarity:.4f}")
+    print(f"📏 Euclidean Distance: {distance:.4f}")
+
+    # Decision logic using both similarity and distance (thresholds live in speaker_id.py)
+    decision = decide(similarity, distance)
+    if decision == SAME:
+        print("✅ Same speaker detected with high confidence!")
+    elif decision == UNCERTAIN:
+        print("⚠️ Possible same speaker, but needs further verification.")
+    else:
+        print("❌ Different speakers.")
+
+
+if __name__ == "__main__":
+    main()
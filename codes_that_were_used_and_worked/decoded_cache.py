@@ -0,0 +1,93 @@
+import os
+import json
+import hashlib
+import numpy as np
+from playback_buffer import load_playback_buffer
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "vocal_correction", "decoded")
+HASHES_FILE = "hashes.json"
+
+
+def _load_json(path):
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def _save_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1)
+    os.replace(tmp, path)
+
+
+def file_digest(path, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    SHA-1 of the file content. The digest is remembered per (path, size, mtime)
+    so a file that has not changed is only hashed once.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    memo_path = os.path.join(cache_dir, HASHES_FILE)
+    memo = _load_json(memo_path)
+
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    entry = memo.get(key)
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["sha1"]
+
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha1.update(chunk)
+    digest = sha1.hexdigest()
+    memo[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": digest}
+    _save_json(memo_path, memo)
+    return digest
+
+
+def _decode(path, sr, channels):
+    """Decode and resample with librosa, returning interleaved (N, channels) float32."""
+    import librosa
+
+    audio, _ = librosa.load(path, sr=sr, mono=(channels == 1))
+    if audio.ndim == 1:
+        audio = audio[np.newaxis, :]
+    if len(audio) < channels:
+        audio = np.repeat(audio[:1], channels, axis=0)  # mono file, stereo layout
+    return np.ascontiguousarray(audio[:channels].T, dtype=np.float32)
+
+
+def cached_decode(path, sr=44100, channels=2, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Decoded audio as a memory-mapped interleaved (N, channels) float32 array.
+    The cache key is the file content hash plus target rate and channel layout, so
+    the decode/resample only happens the first time a song is used.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    key = f"{file_digest(path, cache_dir)}_{sr}hz_{channels}ch"
+    raw_path = os.path.join(cache_dir, key + ".f32")
+    meta_path = os.path.join(cache_dir, key + ".json")
+
+    if not (os.path.exists(raw_path) and os.path.exists(meta_path)):
+        frames = _decode(path, sr, channels)
+        tmp = raw_path + ".tmp"
+        frames.tofile(tmp)
+        os.replace(tmp, raw_path)
+        _save_json(meta_path, {
+            "source": os.path.basename(path),
+            "sample_rate": sr,
+            "channels": channels,
+            "frames": len(frames),
+        })
+
+    return load_playback_buffer(raw_path, channels)
+
+
+def load_window(path, offset=0.0, duration=None, sr=44100, channels=2, cache_dir=DEFAULT_CACHE_DIR):
+    """A [offset, offset + duration) seconds window of the cached decode (a view, no copy)."""
+    frames = cached_decode(path, sr, channels, cache_dir)
+    start = min(int(round(offset * sr)), len(frames))
+    stop = len(frames) if duration is None else min(start + int(round(duration * sr)), len(frames))
+    return frames[start:stop]
@@ -1,7 +1,11 @@
 import os
+import argparse
 import multiprocessing
-import yt_dlp as youtube_dl
-from spleeter.separator import Separator
+import soundfile as sf
+from ingest_cache import IngestCache, video_id_from_url
+from vocal_separation import get_separator, separate_streaming, separate_vocals, SPLEETER_SR
+import instrumentation
+from instrumentation import span
 
 # Multiprocessing support for Windows
 def freeze_support():
@@ -13,8 +17,14 @@ def freeze_support():
 BASE_DIR = r"C:\Users\marie\OneDrive\Desktop\mdptest\pitch_corrector\data"
 RAW_DIR = os.path.join(BASE_DIR, "raw")
 PROCESSED_DIR = os.path.join(BASE_DIR, "processed")
+CACHE_DIR = os.path.join(BASE_DIR, "cache")
 URLS_FILE = "urls.txt"
 
+# Cache configuration
+RAW_CACHE_MAX_BYTES = 5 * 1024 ** 3  # raw WAVs kept before LRU eviction
+SEPARATION_PARAMS = {"model": "spleeter:2stems", "codec": "wav"}
+LONG_TRACK_SECONDS = 600  # longer tracks are separated window by window with bounded memory
+
 # Create directories if they don't exist
 for p in [RAW_DIR, PROCESSED_DIR]:
     os.makedirs(p, exist_ok=True)
@@ -28,17 +38,20 @@ def download_youtube_audio(url):
             'preferredcodec': 'wav',
             'preferredquality': '192',
         }],
-        'outtmpl': os.path.join(RAW_DIR, '%(title)s.%(ext)s'),
+        'outtmpl': os.path.join(RAW_DIR, '%(title)s [%(id)s].%(ext)s'),
         'verbose': True
     }
     
+    import yt_dlp as youtube_dl
+
     try:
-        with youtube_dl.YoutubeDL(ydl_opts) as ydl:
+        with span("download", url=url) as s, youtube_dl.YoutubeDL(ydl_opts) as ydl:
             info = ydl.extract_info(url, download=True)
             filename = ydl.prepare_filename(info)
             wav_path = filename.replace('.webm', '.wav').replace('.m4a', '.wav')
 
             if os.path.exists(wav_path):
+                s.add(bytes_written=os.path.getsize(wav_path), audio_seconds=sf.info(wav_path).duration)
                 print(f"✅ Downloaded: {wav_path}")
                 return wav_path, info['title']
             raise FileNotFoundError(f"Downloaded file not found: {wav_path}")
@@ -46,28 +59,36 @@ def download_youtube_audio(url):
         print(f"❌ Download failed: {str(e)}")
         return None, None
 
-def extract_vocals(input_path, song_title):
+def clean_title(song_title):
+    return "".join(c for c in song_title if c.isalnum() or c in (' ', '_')).rstrip()
+
+def vocals_filename(song_title, sha1):
+    """Output name unique per audio content, so two songs with the same title never collide."""
+    return f"{clean_title(song_title)}_{sha1[:8]}_vocals.wav"
+
+def extract_vocals(input_path, song_title, separator=None, output_name=None):
     """Extract vocals using Spleeter directly to processed folder."""
-    # Create a local Separator to avoid multiprocessing issues
-    local_separator = Separator('spleeter:2stems')
+    # Reuse the caller's Separator (e.g. one per pipeline worker), otherwise create a local one
+    local_separator = separator or get_separator()
     
     try:
-        # Clean title for filename
-        clean_title = "".join(c for c in song_title if c.isalnum() or c in (' ', '_')).rstrip()
-        
-        # Separate and save directly to processed directory
-        local_separator.separate_to_file(input_path, PROCESSED_DIR)
-        
-        # Rename vocals file to title_vocals.wav
-        old_vocals = os.path.join(PROCESSED_DIR, "vocals.wav")
-        new_vocals = os.path.join(PROCESSED_DIR, f"{clean_title}_vocals.wav")
-        
-        os.rename(old_vocals, new_vocals)
-        
-        # Remove accompaniment file if it exists
-        accompaniment = os.path.join(PROCESSED_DIR, "accompaniment.wav")
-        if os.path.exists(accompaniment):
-            os.remove(accompaniment)
+        new_vocals = os.path.join(PROCESSED_DIR, output_name or f"{clean_title(song_title)}_vocals.wav")
+        duration = sf.info(input_path).duration
+
+        # Hour-long recordings: bounded-memory windowed separation, vocals only
+        if duration > LONG_TRACK_SECONDS:
+            with span("separate.streaming", audio_seconds=duration, bytes_read=os.path.getsize(input_path)) as s:
+                separate_streaming(input_path, new_vocals, local_separator)
+                s.add(bytes_written=os.path.getsize(new_vocals))
+            print(f"🎙️ Extracted vocals (streaming) to: {new_vocals}")
+            return new_vocals
+
+        # Separate in memory and write only the vocals stem
+        with span("separate", audio_seconds=duration, bytes_read=os.path.getsize(input_path)) as s:
+            vocals = separate_vocals(input_path, local_separator)
+        with span("write_vocals", audio_seconds=duration) as s:
+            sf.write(new_vocals, vocals, SPLEETER_SR, subtype='PCM_16')
+            s.add(bytes_written=os.path.getsize(new_vocals))
         
         print(f"🎙️ Extracted vocals to: {new_vocals}")
         return new_vocals
@@ -76,39 +97,101 @@ def extract_vocals(input_path, song_title):
         print(f"❌ Vocal extraction failed: {str(e)}")
         return None
 
-def process_url(url):
+def fetch_stage(url, cache):
+    """
+    Download stage with the ingest cache.
+    Returns (raw_path, song_title, sha1, cached_vocals); cached_vocals is set when the
+    vocals of this audio were already extracted and separation can be skipped too.
+    """
+    key = video_id_from_url(url) or url
+    raw_path, song_title, sha1 = cache.lookup_raw(key)
+    if sha1:
+        cached_vocals = cache.lookup_vocals(sha1, SEPARATION_PARAMS)
+        if cached_vocals:
+            instrumentation.counter("cache.vocals_hit")
+            print(f"♻️ Already processed: {cached_vocals}")
+            return raw_path, song_title, sha1, cached_vocals
+
+    if raw_path:
+        instrumentation.counter("cache.raw_hit")
+        print(f"♻️ Using cached download: {raw_path}")
+    else:
+        raw_path, song_title = download_youtube_audio(url)
+        if not raw_path:
+            return None, None, None, None
+        with span("cache.hash", bytes_read=os.path.getsize(raw_path)):
+            sha1 = cache.add_raw(key, url, raw_path, song_title)
+        # Same audio may already have been separated under another URL
+        cached_vocals = cache.lookup_vocals(sha1, SEPARATION_PARAMS)
+        if cached_vocals:
+            print(f"♻️ Already processed: {cached_vocals}")
+            return raw_path, song_title, sha1, cached_vocals
+
+    return raw_path, song_title, sha1, None
+
+def finish_stage(cache, sha1, vocal_path):
+    """Record the separated vocals and keep raw downloads within their byte budget."""
+    with span("cache.finish"):
+        cache.add_vocals(sha1, SEPARATION_PARAMS, vocal_path)
+        freed = cache.evict_raw(RAW_CACHE_MAX_BYTES)
+    if freed:
+        print(f"🧹 Evicted {freed / 1024 ** 2:.0f} MB of raw downloads")
+
+def process_url(url, cache=None):
     """Full processing pipeline for one URL."""
     print(f"\n=== Processing: {url} ===")
+    cache = cache or IngestCache(CACHE_DIR)
     
-    # Download raw audio
-    raw_path, song_title = download_youtube_audio(url)
+    # Download raw audio (skipped when cached)
+    raw_path, song_title, sha1, cached_vocals = fetch_stage(url, cache)
+    if cached_vocals:
+        return cached_vocals
     if not raw_path:
         return None
     
     # Extract vocals with song title
-    vocal_path = extract_vocals(raw_path, song_title)
+    vocal_path = extract_vocals(raw_path, song_title, output_name=vocals_filename(song_title, sha1))
     if not vocal_path:
         return None
     
+    finish_stage(cache, sha1, vocal_path)
     return vocal_path
 
-def main():
+def main(argv=None):
     freeze_support()  # Important for Windows multiprocessing
+
+    parser = argparse.ArgumentParser(description="Download songs and extract their vocals.")
+    parser.add_argument("--urls", default=URLS_FILE, help="File with one URL per line")
+    parser.add_argument("--download-workers", type=int, default=4, help="Concurrent downloads")
+    parser.add_argument("--separation-workers", type=int, default=2, help="Spleeter worker processes")
+    parser.add_argument("--queue-size", type=int, default=8, help="Downloaded songs waiting for separation")
+    parser.add_argument("--serial", action="store_true", help="Process one URL at a time (old behaviour)")
+    parser.add_argument("--trace", help="Write per-stage timings to this JSON lines file and print a summary")
+    args = parser.parse_args(argv)
+    if args.trace:
+        instrumentation.enable(args.trace, truncate=True)
     
-    if not os.path.exists(URLS_FILE):
-        print(f"Missing {URLS_FILE} file! Please create it with one URL per line.")
+    if not os.path.exists(args.urls):
+        print(f"Missing {args.urls} file! Please create it with one URL per line.")
         return
 
-    with open(URLS_FILE, 'r') as f:
+    with open(args.urls, 'r') as f:
         urls = [line.strip() for line in f if line.strip()]
 
     print(f"🚩 Found {len(urls)} URL(s) to process\n")
     
-    # Process each URL
-    for url in urls:
-        process_url(url)
+    if args.serial:
+        # Process each URL
+        cache = IngestCache(CACHE_DIR)
+        for url in urls:
+            process_url(url, cache)
+    else:
+        from ingest_pipeline import run_pipeline
+        run_pipeline(urls, args.download_workers, args.separation_workers, args.queue_size)
 
     print("\n=== ALL DONE ===")
+    if instrumentation.is_enabled():
+        instrumentation.print_summary()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,203 @@
+import os
+import sys
+import json
+import numpy as np
+
+VECTORS_FILE = "vectors.f32"
+INDEX_FILE = "index.json"
+DTYPE = np.float32
+
+
+def speaker_id_from_path(path):
+    """Speaker id for a loose embedding file, e.g. 'ML.npy' or the mis-named 'song.wav.npy'."""
+    name = os.path.basename(path)
+    for ext in (".npy", ".wav"):
+        if name.endswith(ext):
+            name = name[:-len(ext)]
+    return name
+
+
+class EmbeddingStore:
+    """
+    Append-only embedding store: one contiguous float32 file that is memory-mapped,
+    plus a small JSON index holding id, metadata and a tombstone flag per row.
+    """
+
+    def __init__(self, root, dim=None):
+        self.root = root
+        self.vectors_path = os.path.join(root, VECTORS_FILE)
+        self.index_path = os.path.join(root, INDEX_FILE)
+        os.makedirs(root, exist_ok=True)
+
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            self.dim = index["dim"]
+            self.rows = index["rows"]
+            if dim is not None and dim != self.dim:
+                raise ValueError(f"Store has dim {self.dim}, not {dim}.")
+        else:
+            self.dim = dim
+            self.rows = []
+        self._mmap = None
+
+    # ---------------------
+    # INDEX
+    # ---------------------
+    def _write_index(self):
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "rows": self.rows}, f, separators=(",", ":"))
+        os.replace(tmp, self.index_path)
+
+    def _live_rows(self, speaker_id):
+        return [i for i, row in enumerate(self.rows) if row["id"] == speaker_id and not row["deleted"]]
+
+    def ids(self):
+        """Ids of all live (non-deleted) rows, in storage order."""
+        return [row["id"] for row in self.rows if not row["deleted"]]
+
+    def metadata(self, speaker_id):
+        rows = self._live_rows(speaker_id)
+        if not rows:
+            raise KeyError(speaker_id)
+        return self.rows[rows[-1]]["meta"]
+
+    def __len__(self):
+        return sum(1 for row in self.rows if not row["deleted"])
+
+    def __contains__(self, speaker_id):
+        return bool(self._live_rows(speaker_id))
+
+    # ---------------------
+    # VECTORS
+    # ---------------------
+    def vectors(self):
+        """Memory-mapped (rows, dim) view of every stored row, tombstoned ones included."""
+        if self._mmap is None:
+            if not self.rows:
+                return np.empty((0, self.dim or 0), dtype=DTYPE)
+            self._mmap = np.memmap(self.vectors_path, dtype=DTYPE, mode="r", shape=(len(self.rows), self.dim))
+        return self._mmap
+
+    def get(self, speaker_id):
+        rows = self._live_rows(speaker_id)
+        if not rows:
+            raise KeyError(speaker_id)
+        return np.array(self.vectors()[rows[-1]])
+
+    def live(self):
+        """(ids, matrix) for live rows. The matrix is the mmap itself when nothing is tombstoned."""
+        mask = np.array([not row["deleted"] for row in self.rows], dtype=bool)
+        ids = [row["id"] for row in self.rows if not row["deleted"]]
+        matrix = self.vectors()
+        if not mask.all():
+            matrix = matrix[mask]
+        return ids, matrix
+
+    def append(self, speaker_id, embedding, meta=None, replace=True):
+        """Append one embedding. With replace=True an older row for the same id is tombstoned."""
+        return self.append_many([speaker_id], [embedding], [meta], replace=replace)
+
+    def append_many(self, speaker_ids, embeddings, metas=None, replace=True):
+        """Append a batch of embeddings with a single write and a single index update."""
+        embeddings = np.atleast_2d(np.asarray(embeddings, dtype=DTYPE))
+        if metas is None:
+            metas = [None] * len(speaker_ids)
+        if len(speaker_ids) != len(embeddings) or len(metas) != len(embeddings):
+            raise ValueError("Need one id and one metadata entry per embedding.")
+        if self.dim is None:
+            self.dim = embeddings.shape[1]
+        if embeddings.shape[1] != self.dim:
+            raise ValueError(f"Embedding dim {embeddings.shape[1]} does not match store dim {self.dim}.")
+
+        if replace:
+            # An id repeated within the batch keeps only its last embedding
+            last = {speaker_id: i for i, speaker_id in enumerate(speaker_ids)}
+            keep = sorted(last.values())
+            if len(keep) < len(speaker_ids):
+                speaker_ids = [speaker_ids[i] for i in keep]
+                metas = [metas[i] for i in keep]
+                embeddings = embeddings[keep]
+
+        # Write after the last indexed row, dropping any bytes left by an interrupted append
+        self._mmap = None
+        offset = len(self.rows) * self.dim * DTYPE().itemsize
+        mode = "r+b" if os.path.exists(self.vectors_path) else "wb"
+        with open(self.vectors_path, mode) as f:
+            f.seek(offset)
+            f.write(np.ascontiguousarray(embeddings).tobytes())
+            f.truncate()
+
+        if replace:
+            for speaker_id in set(speaker_ids):
+                for i in self._live_rows(speaker_id):
+                    self.rows[i]["deleted"] = True
+        for speaker_id, meta in zip(speaker_ids, metas):
+            self.rows.append({"id": speaker_id, "meta": meta or {}, "deleted": False})
+        self._write_index()
+
+    def delete(self, speaker_id):
+        """Tombstone every live row of a speaker; space is reclaimed by compact()."""
+        rows = self._live_rows(speaker_id)
+        if not rows:
+            raise KeyError(speaker_id)
+        for i in rows:
+            self.rows[i]["deleted"] = True
+        self._write_index()
+
+    def compact(self):
+        """Rewrite the vectors file without tombstoned rows. Returns the number of rows dropped."""
+        keep = [i for i, row in enumerate(self.rows) if not row["deleted"]]
+        dropped = len(self.rows) - len(keep)
+        if dropped == 0:
+            return 0
+
+        tmp = self.vectors_path + ".tmp"
+        vectors = self.vectors()
+        with open(tmp, "wb") as f:
+            f.write(np.ascontiguousarray(vectors[keep]).tobytes())
+        self._mmap = None
+        del vectors
+        os.replace(tmp, self.vectors_path)
+
+        self.rows = [self.rows[i] for i in keep]
+        self._write_index()
+        return dropped
+
+    def import_npy(self, paths):
+        """Migrate loose .npy embeddings into the store. Returns the imported ids."""
+        ids = [speaker_id_from_path(p) for p in paths]
+        embeddings = [np.load(p).astype(DTYPE).ravel() for p in paths]
+        metas = [{"source": os.path.basename(p)} for p in paths]
+        self.append_many(ids, embeddings, metas)
+        return ids
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage:")
+        print("  python embedding_store.py import <store_dir> <file.npy> [...]")
+        print("  python embedding_store.py list <store_dir>")
+        print("  python embedding_store.py delete <store_dir> <speaker_id>")
+        print("  python embedding_store.py compact <store_dir>")
+        return
+
+    command, store = sys.argv[1], EmbeddingStore(sys.argv[2])
+    if command == "import":
+        ids = store.import_npy(sys.argv[3:])
+        print(f"✅ Imported {len(ids)} embedding(s) into {store.root}")
+    elif command == "list":
+        for speaker_id in store.ids():
+            print(speaker_id)
+    elif command == "delete":
+        store.delete(sys.argv[3])
+        print(f"🗑️ Deleted {sys.argv[3]}")
+    elif command == "compact":
+        print(f"✅ Compacted, dropped {store.compact()} row(s)")
+    else:
+        print(f"Unknown command: {command}")
+
+
+if __name__ == "__main__":
+    main()
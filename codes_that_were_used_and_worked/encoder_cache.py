@@ -0,0 +1,113 @@
+import threading
+import time
+import numpy as np
+
+# resemblyzer/torch are imported lazily so that importing this module stays cheap.
+
+_encoders = {}
+_lock = threading.Lock()
+
+# Throughput of the last embed_batch() call
+last_run = {"utterances": 0, "partials": 0, "seconds": 0.0, "utterances_per_second": 0.0}
+
+
+def set_num_threads(threads):
+    """Limit the number of CPU threads torch uses for inference."""
+    import torch
+    if threads:
+        torch.set_num_threads(int(threads))
+
+
+def get_encoder(device=None, threads=None, weights_fpath=None):
+    """
+    Return the process-wide VoiceEncoder for this device/weights, loading it only once.
+    :param device: 'cpu', 'cuda' or None for resemblyzer's default.
+    :param threads: optional CPU thread count for torch.
+    :param weights_fpath: optional custom model weights.
+    """
+    set_num_threads(threads)
+    key = (str(device), str(weights_fpath))
+    with _lock:
+        encoder = _encoders.get(key)
+        if encoder is None:
+            from resemblyzer import VoiceEncoder
+            encoder = VoiceEncoder(device=device, verbose=False, weights_fpath=weights_fpath)
+            _encoders[key] = encoder
+    return encoder
+
+
+def clear_cache():
+    with _lock:
+        _encoders.clear()
+
+
+def _partial_mels(encoder, wav, rate, min_coverage):
+    """Fixed-length mel partials of one utterance, exactly as VoiceEncoder.embed_utterance cuts them."""
+    from resemblyzer import audio
+
+    wav_slices, mel_slices = encoder.compute_partial_slices(len(wav), rate, min_coverage)
+    max_wave_length = wav_slices[-1].stop
+    if max_wave_length >= len(wav):
+        wav = np.pad(wav, (0, max_wave_length - len(wav)), "constant")
+    mel = audio.wav_to_mel_spectrogram(wav)
+    return np.array([mel[s] for s in mel_slices])
+
+
+def embed_batch(wavs, encoder=None, max_partials=512, rate=1.3, min_coverage=0.75, threads=None, verbose=True):
+    """
+    Embed many 16 kHz waveforms with batched forward passes.
+    Every partial utterance has the same number of frames, so the partials of all
+    utterances are stacked into one tensor (split into chunks of max_partials) and
+    the per-utterance embeddings are the L2-normed mean of their partials,
+    matching VoiceEncoder.embed_utterance.
+    :return: float32 array of shape (len(wavs), embedding_size).
+    """
+    import torch
+
+    if encoder is None:
+        encoder = get_encoder(threads=threads)
+    else:
+        set_num_threads(threads)
+
+    start = time.perf_counter()
+    partials = [_partial_mels(encoder, np.asarray(wav, dtype=np.float32), rate, min_coverage) for wav in wavs]
+    counts = [len(p) for p in partials]
+    if not partials:
+        return np.empty((0, 0), dtype=np.float32)
+    mels = np.concatenate(partials)
+
+    embeds = []
+    with torch.no_grad():
+        for i in range(0, len(mels), max_partials):
+            chunk = torch.from_numpy(mels[i:i + max_partials]).to(encoder.device)
+            embeds.append(encoder(chunk).cpu().numpy())
+    partial_embeds = np.concatenate(embeds)
+
+    # Average each utterance's partials with one reduceat instead of a Python loop
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    raw = np.add.reduceat(partial_embeds, offsets, axis=0) / np.array(counts)[:, None]
+    result = (raw / np.linalg.norm(raw, axis=1, keepdims=True)).astype(np.float32)
+
+    elapsed = time.perf_counter() - start
+    last_run.update(
+        utterances=len(wavs),
+        partials=int(len(mels)),
+        seconds=elapsed,
+        utterances_per_second=len(wavs) / elapsed if elapsed > 0 else 0.0,
+    )
+    if verbose:
+        print(f"🔄 Embedded {len(wavs)} utterance(s) ({len(mels)} partials) in {elapsed:.2f}s "
+              f"-> {last_run['utterances_per_second']:.1f} utt/s")
+    return result
+
+
+def embed_utterance(wav, **kwargs):
+    """Single-utterance convenience wrapper using the cached encoder."""
+    return embed_batch([wav], verbose=False, **kwargs)[0]
+
+
+def embed_files(paths, **kwargs):
+    """Load audio files at 16 kHz (as expected by resemblyzer) and embed them in one batch."""
+    import librosa
+    wavs = [librosa.load(path, sr=16000)[0] for path in paths]
+    return embed_batch(wavs, **kwargs)
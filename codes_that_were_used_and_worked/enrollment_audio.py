@@ -0,0 +1,123 @@
+import os
+import wave
+from math import gcd
+import numpy as np
+import audio_loader
+
+SILENCE_FRAME_RATE = 11025  # frame rate of pydub's AudioSegment.silent()
+LEADING_SILENCE_MS = 500
+NOTE_GAP_MS = 300
+SENTENCE_GAP_MS = 1000
+
+
+def enrollment_layout(note_paths, sentence_path=None):
+    """
+    Pieces of the combined enrollment file, in order: ("silence", ms) or ("audio", path).
+    Same layout combine_audio() has always produced; missing files are skipped.
+    """
+    layout = [("silence", LEADING_SILENCE_MS)]
+    for path in note_paths:
+        if os.path.exists(path):
+            layout += [("audio", path), ("silence", NOTE_GAP_MS)]
+    if sentence_path and os.path.exists(sentence_path):
+        layout += [("silence", SENTENCE_GAP_MS), ("audio", sentence_path)]
+    return layout
+
+
+def silence_frames(ms, sr):
+    """
+    Frames of AudioSegment.silent(ms) once pydub has converted it to sr: silent() makes
+    int(11025 * ms / 1000) frames and audioop.ratecv turns n frames into
+    (n - 1) * b // a + 1, with a/b the reduced rate ratio.
+    """
+    n = int(SILENCE_FRAME_RATE * (ms / 1000.0))
+    if sr == SILENCE_FRAME_RATE or n == 0:
+        return n
+    g = gcd(SILENCE_FRAME_RATE, sr)
+    a, b = SILENCE_FRAME_RATE // g, sr // g
+    return (n - 1) * b // a + 1
+
+
+def assemble(layout):
+    """
+    Combined enrollment audio as one preallocated int16 (frames, channels) array.
+    The total length is computed up front and every piece is copied in once.
+    :return: (pcm, sr), or None when the recordings don't share one 16-bit format
+             (pydub would resample some of them; use assemble_pydub() for those).
+    """
+    decoded = {path: audio_loader.decode(path) for kind, path in layout if kind == "audio"}
+    formats = {(d.sr, d.audio.shape[1], d.subtype) for d in decoded.values()}
+    if len(formats) != 1:
+        return None
+    sr, channels, subtype = formats.pop()
+    if subtype != "PCM_16" or sr < SILENCE_FRAME_RATE:
+        return None
+
+    lengths = [len(decoded[item].audio) if kind == "audio" else silence_frames(item, sr) for kind, item in layout]
+    pcm = np.zeros((sum(lengths), channels), dtype=np.int16)
+    pos = 0
+    for (kind, item), length in zip(layout, lengths):
+        if kind == "audio":
+            # 16-bit samples decode to x / 32768 exactly, so this is lossless
+            pcm[pos:pos + length] = np.round(decoded[item].audio * 32768)
+        pos += length
+    return pcm, sr
+
+
+def assemble_pydub(layout):
+    """
+    The original AudioSegment concatenation, for inputs assemble() can't reproduce.
+    A note and the gap after it are joined before being appended, as combine_audio() always did.
+    """
+    from pydub import AudioSegment
+
+    def piece(kind, item):
+        return AudioSegment.from_wav(item) if kind == "audio" else AudioSegment.silent(duration=item)
+
+    combined = piece(*layout[0])
+    i = 1
+    while i < len(layout):
+        kind, item = layout[i]
+        if kind == "audio" and i + 1 < len(layout) and layout[i + 1][0] == "silence":
+            combined += piece(kind, item) + piece(*layout[i + 1])
+            i += 2
+        else:
+            combined += piece(kind, item)
+            i += 1
+    return combined
+
+
+def write_wav(path, pcm, sr):
+    """Write int16 PCM with the wave module, byte for byte what AudioSegment.export(format="wav") writes."""
+    with wave.open(path, "wb") as f:
+        f.setnchannels(pcm.shape[1])
+        f.setsampwidth(2)
+        f.setframerate(sr)
+        f.setnframes(len(pcm))
+        f.writeframesraw(np.ascontiguousarray(pcm, dtype="<i2").tobytes())
+
+
+def combine(layout, output_path=None):
+    """
+    Assemble the enrollment audio, writing it to output_path when given.
+    :return: (pcm, sr) with pcm a signed integer (frames, channels) array (int16 unless
+             the pydub fallback had to keep wider samples).
+    """
+    assembled = assemble(layout)
+    if assembled is not None:
+        if output_path:
+            write_wav(output_path, *assembled)
+        return assembled
+
+    segment = assemble_pydub(layout)
+    if output_path:
+        segment.export(output_path, format="wav")
+    pcm = np.array(segment.get_array_of_samples()).reshape(-1, segment.channels)
+    return pcm, segment.frame_rate
+
+
+def to_float(pcm, sr, target_sr=None):
+    """Mono float32 at target_sr, exactly what audio_loader.load(combined file, sr=target_sr) returns."""
+    scale = -float(np.iinfo(pcm.dtype).min)
+    y = (pcm.astype(np.float32) / np.float32(scale)).mean(axis=1)
+    return audio_loader.resample(y, sr, target_sr or sr), target_sr or sr
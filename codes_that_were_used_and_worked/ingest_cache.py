@@ -0,0 +1,146 @@
+import os
+import re
+import json
+import time
+import threading
+from decoded_cache import file_digest
+
+MANIFEST_FILE = "manifest.json"
+
+_VIDEO_ID_PATTERNS = [
+    re.compile(r"[?&]v=([A-Za-z0-9_-]{11})"),
+    re.compile(r"youtu\.be/([A-Za-z0-9_-]{11})"),
+    re.compile(r"/(?:shorts|embed|live)/([A-Za-z0-9_-]{11})"),
+]
+
+
+def video_id_from_url(url):
+    """YouTube video id parsed from the URL, or None when the URL has no recognizable id."""
+    for pattern in _VIDEO_ID_PATTERNS:
+        match = pattern.search(url)
+        if match:
+            return match.group(1)
+    return None
+
+
+def params_key(params):
+    return json.dumps(params, sort_keys=True, separators=(",", ":"))
+
+
+class IngestCache:
+    """
+    Manifest of what the ingest pipeline already produced:
+      videos: video id -> raw WAV path, size, content hash, title, last access
+      stems:  raw content hash + separation parameters -> vocals path and size
+    A stage is skipped when its recorded output still exists with the recorded size.
+    Raw files can be evicted least-recently-used first once they exceed a byte budget;
+    their vocals stay valid because stems are keyed by content hash. Only raws that
+    already have their vocals and that the pipeline itself created are ever evicted.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.path = os.path.join(root, MANIFEST_FILE)
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        else:
+            self.manifest = {"videos": {}, "stems": {}}
+
+    def _save(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(tmp, self.path)
+
+    @staticmethod
+    def _valid(path, size):
+        return bool(path) and os.path.exists(path) and os.path.getsize(path) == size
+
+    # ---------------------
+    # RAW DOWNLOADS
+    # ---------------------
+    def lookup_raw(self, video_id):
+        """(raw_path, title, sha1) for a cached download, or (None, title, sha1) when the file is gone."""
+        with self._lock:
+            entry = self.manifest["videos"].get(video_id)
+            if entry is None:
+                return None, None, None
+            if not self._valid(entry["raw"], entry["size"]):
+                return None, entry["title"], entry["sha1"]
+            entry["last_access"] = time.time()
+            self._save()
+            return entry["raw"], entry["title"], entry["sha1"]
+
+    def add_raw(self, video_id, url, raw_path, title, owned=True):
+        """
+        Record a finished download. Returns the content hash of the raw audio.
+        :param owned: False when raw_path is the user's own file, which must never be evicted
+        """
+        with self._lock:
+            # Under the lock: file_digest() updates a memo file shared by all download threads
+            sha1 = file_digest(raw_path, self.root)
+            self.manifest["videos"][video_id] = {
+                "url": url,
+                "raw": raw_path,
+                "size": os.path.getsize(raw_path),
+                "sha1": sha1,
+                "title": title,
+                "last_access": time.time(),
+                "owned": owned,
+            }
+            self._save()
+        return sha1
+
+    # ---------------------
+    # SEPARATED STEMS
+    # ---------------------
+    def lookup_vocals(self, sha1, params):
+        with self._lock:
+            entry = self.manifest["stems"].get(f"{sha1}:{params_key(params)}")
+            if entry and self._valid(entry["vocals"], entry["size"]):
+                return entry["vocals"]
+            return None
+
+    def add_vocals(self, sha1, params, vocals_path):
+        with self._lock:
+            self.manifest["stems"][f"{sha1}:{params_key(params)}"] = {
+                "vocals": vocals_path,
+                "size": os.path.getsize(vocals_path),
+                "params": params,
+            }
+            self._save()
+
+    # ---------------------
+    # EVICTION
+    # ---------------------
+    def raw_bytes(self):
+        with self._lock:
+            return sum(e["size"] for e in self.manifest["videos"].values() if self._valid(e["raw"], e["size"]))
+
+    def evict_raw(self, max_bytes):
+        """
+        Delete least-recently-used raw files until they fit in max_bytes. Returns bytes freed.
+        A raw is only deleted once its vocals are stored, and only if the cache created it.
+        """
+        with self._lock:
+            separated = {key.split(":", 1)[0] for key, stem in self.manifest["stems"].items()
+                         if self._valid(stem["vocals"], stem["size"])}
+            entries = [e for e in self.manifest["videos"].values() if self._valid(e["raw"], e["size"])]
+            total = sum(e["size"] for e in entries)
+            freed = 0
+            for entry in sorted(entries, key=lambda e: e["last_access"]):
+                if total - freed <= max_bytes:
+                    break
+                # Entries written before the owned flag: an upload used in place has raw == url
+                owned = entry.get("owned", entry["raw"] != entry["url"])
+                if not owned or entry["sha1"] not in separated:
+                    continue
+                os.remove(entry["raw"])
+                freed += entry["size"]
+                entry["raw"] = None
+            if freed:
+                self._save()
+            return freed
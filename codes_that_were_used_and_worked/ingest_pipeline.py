@@ -0,0 +1,104 @@
+import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import download_and_process as dp
+from ingest_cache import IngestCache
+
+# One Separator per separation worker process, loaded once by the pool initializer
+_separator = None
+
+
+def _init_separation_worker():
+    """Load the Spleeter model once per worker process instead of once per song."""
+    global _separator
+    from spleeter.separator import Separator
+    # multiprocess=False: pool workers are daemonic and cannot start their own pool
+    _separator = Separator('spleeter:2stems', multiprocess=False)
+
+
+def _separate(raw_path, song_title, output_name):
+    """Runs inside a separation worker."""
+    start = time.perf_counter()
+    vocal_path = dp.extract_vocals(raw_path, song_title, separator=_separator, output_name=output_name)
+    return vocal_path, time.perf_counter() - start
+
+
+def _download(url, cache, downloaded):
+    """Runs in a download thread; blocks on the bounded queue when separation falls behind."""
+    start = time.perf_counter()
+    fetched = (None, None, None, None)
+    try:
+        fetched = dp.fetch_stage(url, cache)
+    finally:
+        # Always report back, otherwise the dispatcher would wait forever
+        downloaded.put((url, fetched, time.perf_counter() - start))
+
+
+def run_pipeline(urls, download_workers=4, separation_workers=2, queue_size=8, cache=None):
+    """
+    Staged ingest: I/O-bound download threads feed a bounded queue that is drained
+    into a process pool of separation workers, each holding a warm Separator.
+    At most queue_size downloaded songs wait for separation, and at most
+    2 * separation_workers separations are in flight, so downloads pause when
+    separation is the bottleneck.
+    Songs already in the ingest cache skip the stages whose output is still valid.
+    :return: (dict of url -> vocals path (None on failure), throughput summary dict)
+    """
+    urls = list(dict.fromkeys(urls))  # a URL listed twice is processed once
+    cache = cache or IngestCache(dp.CACHE_DIR)
+    start = time.perf_counter()
+    downloaded = queue.Queue(maxsize=queue_size)
+    in_flight = threading.Semaphore(2 * separation_workers)
+    results = {}
+    download_times, separation_times = [], []
+
+    def on_separated(url, sha1, future):
+        in_flight.release()
+        try:
+            vocal_path, elapsed = future.result()
+            separation_times.append(elapsed)
+            if vocal_path:
+                dp.finish_stage(cache, sha1, vocal_path)
+        except Exception as e:
+            print(f"❌ Separation worker failed for {url}: {e}")
+            vocal_path = None
+        results[url] = vocal_path
+
+    with ProcessPoolExecutor(max_workers=separation_workers, initializer=_init_separation_worker) as separators, \
+            ThreadPoolExecutor(max_workers=download_workers) as downloaders:
+        for url in urls:
+            downloaders.submit(_download, url, cache, downloaded)
+
+        for _ in urls:
+            url, (raw_path, song_title, sha1, cached_vocals), elapsed = downloaded.get()
+            download_times.append(elapsed)
+            if cached_vocals or not raw_path:
+                results[url] = cached_vocals
+                continue
+            in_flight.acquire()
+            future = separators.submit(_separate, raw_path, song_title, dp.vocals_filename(song_title, sha1))
+            future.add_done_callback(lambda f, url=url, sha1=sha1: on_separated(url, sha1, f))
+
+    wall = time.perf_counter() - start
+    summary = {
+        "songs": len(urls),
+        "succeeded": sum(1 for path in results.values() if path),
+        "failed": sum(1 for path in results.values() if not path),
+        "wall_seconds": wall,
+        "songs_per_hour": 3600 * len(urls) / wall if wall > 0 else 0.0,
+        "download_seconds_total": sum(download_times),
+        "separation_seconds_total": sum(separation_times),
+        "download_workers": download_workers,
+        "separation_workers": separation_workers,
+    }
+    print_summary(summary)
+    return results, summary
+
+
+def print_summary(summary):
+    print("\n=== THROUGHPUT ===")
+    print(f"Songs: {summary['songs']} ({summary['succeeded']} ok, {summary['failed']} failed)")
+    print(f"Wall time: {summary['wall_seconds']:.1f}s -> {summary['songs_per_hour']:.1f} songs/hour")
+    print(f"Download busy time: {summary['download_seconds_total']:.1f}s over {summary['download_workers']} worker(s)")
+    print(f"Separation busy time: {summary['separation_seconds_total']:.1f}s over {summary['separation_workers']} worker(s)")
@@ -0,0 +1,452 @@
+import os
+import sys
+import time
+import shutil
+import asyncio
+import hashlib
+import argparse
+import itertools
+import threading
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor
+import download_and_process as dp
+from ingest_cache import IngestCache, video_id_from_url
+
+# Asyncio front end for ingestion: URLs and uploaded files are accepted at any time.
+# Downloads, uploads and cache bookkeeping run as coroutines limited by semaphores;
+# separation and pitch analysis run in process pools. A bounded queue sits in front of
+# separation: a download keeps its slot until its song fits in the queue, so downloads
+# pause while separation is the bottleneck, and submit() waits once max_pending songs
+# are in the service.
+CHUNK_BYTES = 1024 * 1024
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".flac", ".ogg", ".m4a")
+WATCH_INTERVAL = 2.0  # seconds between scans of a watched upload folder
+UPLOAD_DIR = os.path.join(dp.RAW_DIR, "uploads")
+
+
+async def _in_thread(func, *args):
+    return await asyncio.get_running_loop().run_in_executor(None, partial(func, *args))
+
+
+# ---------------------
+# DOWNLOADERS
+# ---------------------
+class YoutubeDownloader:
+    """yt-dlp download (download_and_process.download_youtube_audio) in a worker thread."""
+
+    async def fetch(self, url, progress=None):
+        raw_path, title = await _in_thread(dp.download_youtube_audio, url)
+        if not raw_path:
+            raise RuntimeError(f"Download failed: {url}")
+        return raw_path, title
+
+
+class LocalDownloader:
+    """
+    Network-free stand-in for YoutubeDownloader. A URL is served from a local file,
+    copied chunk by chunk (optionally throttled), so progress, concurrency and
+    cancellation behave like a real download.
+    :param directory: URLs are looked up here by their last path component.
+    :param sources: optional explicit url -> file mapping, checked first.
+    :param bytes_per_second: simulated bandwidth per download, unlimited when None.
+    """
+
+    def __init__(self, directory=None, sources=None, raw_dir=dp.RAW_DIR, bytes_per_second=None,
+                 chunk_bytes=CHUNK_BYTES):
+        self.directory = directory
+        self.sources = dict(sources or {})
+        self.raw_dir = raw_dir
+        self.bytes_per_second = bytes_per_second
+        self.chunk_bytes = chunk_bytes
+        os.makedirs(raw_dir, exist_ok=True)
+
+    def _source(self, url):
+        if url in self.sources:
+            return self.sources[url]
+        name = url.rstrip("/").rsplit("/", 1)[-1]
+        path = os.path.join(self.directory or ".", name)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No local file for {url}")
+        return path
+
+    async def fetch(self, url, progress=None):
+        source = self._source(url)
+        title = os.path.splitext(os.path.basename(source))[0]
+        # Same naming as yt-dlp's '%(title)s [%(id)s]' so titles never collide
+        video_id = video_id_from_url(url) or hashlib.sha1(url.encode("utf-8")).hexdigest()[:11]
+        target = os.path.join(self.raw_dir, f"{title} [{video_id}]{os.path.splitext(source)[1]}")
+        partial_path = target + ".part"
+        total = os.path.getsize(source) or 1
+        copied = 0
+        try:
+            with open(source, "rb") as src, open(partial_path, "wb") as dst:
+                while True:
+                    chunk = await _in_thread(src.read, self.chunk_bytes)
+                    if not chunk:
+                        break
+                    await _in_thread(dst.write, chunk)
+                    copied += len(chunk)
+                    if progress is not None:
+                        progress(copied / total)
+                    if self.bytes_per_second:
+                        await asyncio.sleep(len(chunk) / self.bytes_per_second)
+            os.replace(partial_path, target)
+        except BaseException:
+            if os.path.exists(partial_path):
+                os.remove(partial_path)
+            raise
+        return target, title
+
+
+# ---------------------
+# SERVICE
+# ---------------------
+class IngestJob:
+    def __init__(self, job_id, source, kind):
+        self.id = job_id
+        self.source = source
+        self.kind = kind  # "url" or "file"
+        self.stage = "queued"
+        self.vocals = None
+        self.analysis = None
+        self.error = None
+        self.task = None
+        self.separated = None  # future resolved by a separation worker
+        self.submitted = time.time()
+
+
+def print_event(event):
+    """Default progress output: one line per stage change."""
+    icons = {"queued": "📥", "downloading": "⬇️", "uploading": "📂", "waiting": "⏳", "separating": "🎙️",
+             "analyzing": "🎵", "cached": "♻️", "done": "✅", "failed": "❌", "cancelled": "🛑"}
+    detail = ""
+    if event.get("progress") is not None:
+        detail = f" {100 * event['progress']:.0f}%"
+    elif event.get("error"):
+        detail = f" {event['error']}"
+    elif event.get("vocals"):
+        detail = f" {event['vocals']}"
+    print(f"{icons.get(event['stage'], '•')} [{event['job']}] {event['stage']}{detail} ({event['source']})")
+
+
+class IngestService:
+    """
+    Continuous ingestion with bounded concurrency:
+        async with IngestService(LocalDownloader("songs")) as service:
+            job = await service.submit("https://example.com/song.wav")
+            await service.join()
+    Each job emits progress events (dicts with job, source, stage, time and stage-specific fields)
+    to on_event. Songs already in the ingest cache skip the stages whose output is still valid.
+    :param separate: function run in the separation pool, (raw_path, title, output_name) ->
+                     (vocals_path, seconds); Spleeter's ingest_pipeline._separate by default.
+    :param initializer: separation pool initializer (loads one Separator per worker by default).
+    """
+
+    def __init__(self, downloader=None, cache=None, download_workers=4, upload_workers=2, disk_workers=2,
+                 separation_workers=2, queue_size=4, analysis_workers=1, analyze=True, engine="yin",
+                 max_pending=64, on_event=print_event, separate=None, initializer=None, upload_dir=UPLOAD_DIR):
+        self.downloader = downloader or YoutubeDownloader()
+        self.cache = cache or IngestCache(dp.CACHE_DIR)
+        self.separation_workers = separation_workers
+        self.analysis_workers = analysis_workers
+        self.analyze = analyze
+        self.engine = engine
+        self.on_event = on_event
+        self.upload_dir = upload_dir
+        self.upload_copies = set()  # absolute paths this service copied into upload_dir
+        if separate is None:
+            from ingest_pipeline import _separate, _init_separation_worker
+            separate, initializer = _separate, initializer or _init_separation_worker
+        self.separate = separate
+        self.initializer = initializer
+
+        self.limits = {"download": download_workers, "upload": upload_workers, "disk": disk_workers,
+                       "pending": max_pending, "queue": queue_size}
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        self._workers = []
+        self._separators = None
+        self._analyzers = None
+
+    async def start(self):
+        # Created here, inside the running loop (older asyncio binds them to the loop at creation)
+        self._downloads = asyncio.Semaphore(self.limits["download"])
+        self._uploads = asyncio.Semaphore(self.limits["upload"])
+        self._disk = asyncio.Semaphore(self.limits["disk"])  # short file operations only, never held while waiting
+        self._pending = asyncio.Semaphore(self.limits["pending"])
+        self._separation_queue = asyncio.Queue(maxsize=self.limits["queue"])
+        self._separators = ProcessPoolExecutor(self.separation_workers, initializer=self.initializer)
+        if self.analyze:
+            self._analyzers = ProcessPoolExecutor(self.analysis_workers)
+        self._workers = [asyncio.ensure_future(self._separation_worker()) for _ in range(self.separation_workers)]
+        return self
+
+    async def close(self, cancel=True):
+        """Cancel (or wait for) the remaining jobs, then stop the workers and pools."""
+        if cancel:
+            for job in self.jobs.values():
+                job.task.cancel()
+        await self.join()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        for pool in (self._separators, self._analyzers):
+            if pool is not None:
+                await _in_thread(pool.shutdown)
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close(cancel=exc_type is not None)
+        return False
+
+    # ---------------------
+    # SUBMISSION
+    # ---------------------
+    async def submit(self, source):
+        """Queue a URL or a local file; waits while max_pending songs are already in the service."""
+        kind = "file" if os.path.exists(source) else "url"
+        await self._pending.acquire()
+        job = IngestJob(next(self._ids), source, kind)
+        self.jobs[job.id] = job
+        self._emit(job, "queued")
+        job.task = asyncio.ensure_future(self._run(job))
+        job.task.add_done_callback(lambda task: self._finished(job, task))
+        return job
+
+    def _finished(self, job, task):
+        """Done callback: runs even for a job cancelled before _run() started."""
+        self._pending.release()
+        if task.cancelled():
+            self._emit(job, "cancelled")
+
+    def cancel(self, job_id):
+        """Cancel a job at whatever stage it is; a separation already running finishes but is ignored."""
+        job = self.jobs.get(job_id)
+        if job is None or job.task.done():
+            return False
+        job.task.cancel()
+        return True
+
+    async def join(self):
+        """Wait until every submitted job has finished, failed or been cancelled."""
+        while True:
+            tasks = [job.task for job in self.jobs.values() if not job.task.done()]
+            if not tasks:
+                return
+            await asyncio.wait(tasks)
+
+    def summary(self):
+        stages = {}
+        for job in self.jobs.values():
+            stages[job.stage] = stages.get(job.stage, 0) + 1
+        return stages
+
+    def _emit(self, job, stage, **fields):
+        job.stage = stage
+        if self.on_event is not None:
+            event = {"job": job.id, "source": job.source, "stage": stage, "time": time.time()}
+            event.update(fields)
+            self.on_event(event)
+
+    def _progress(self, job, stage):
+        """Progress callback emitting at most one event per 10% (0% is emitted by the caller)."""
+        last = [0]
+
+        def report(fraction):
+            step = int(fraction * 10)
+            if step != last[0]:
+                last[0] = step
+                self._emit(job, stage, progress=fraction)
+        return report
+
+    # ---------------------
+    # STAGES
+    # ---------------------
+    async def _run(self, job):
+        try:
+            slot = self._downloads if job.kind == "url" else self._uploads
+            async with slot:
+                fetch = self._fetch_url if job.kind == "url" else self._fetch_file
+                raw_path, title, sha1, cached_vocals = await fetch(job)
+                if not cached_vocals:
+                    # Backpressure: hold the download/upload slot until separation has room
+                    job.separated = asyncio.get_running_loop().create_future()
+                    if self._separation_queue.full():
+                        self._emit(job, "waiting")
+                    await self._separation_queue.put((job, raw_path, title, sha1))
+
+            if cached_vocals:
+                job.vocals = cached_vocals
+                self._emit(job, "cached", vocals=cached_vocals)
+            else:
+                job.vocals = await job.separated
+
+            if self.analyze:
+                self._emit(job, "analyzing")
+                from batch_analysis import analyze_file
+                loop = asyncio.get_running_loop()
+                job.analysis = await loop.run_in_executor(self._analyzers, analyze_file, job.vocals, None, self.engine)
+            self._emit(job, "done", vocals=job.vocals)
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            self._emit(job, "failed", error=job.error)
+
+    async def _fetch_url(self, job):
+        """Download stage with the ingest cache (the async form of download_and_process.fetch_stage)."""
+        url = job.source
+        key = video_id_from_url(url) or url
+        raw_path, title, sha1 = await _in_thread(self.cache.lookup_raw, key)
+        if sha1:
+            cached_vocals = await _in_thread(self.cache.lookup_vocals, sha1, dp.SEPARATION_PARAMS)
+            if cached_vocals:
+                return raw_path, title, sha1, cached_vocals
+        if not raw_path:
+            self._emit(job, "downloading", progress=0.0)
+            raw_path, title = await self.downloader.fetch(url, progress=self._progress(job, "downloading"))
+            async with self._disk:
+                sha1 = await _in_thread(self.cache.add_raw, key, url, raw_path, title)
+        cached_vocals = await _in_thread(self.cache.lookup_vocals, sha1, dp.SEPARATION_PARAMS)
+        return raw_path, title, sha1, cached_vocals
+
+    async def _fetch_file(self, job):
+        """
+        Copy an uploaded file next to the downloads and hash it, as upload_song.upload_audio copies uploads.
+        A file that is already in upload_dir is not copied again.
+        """
+        self._emit(job, "uploading")
+        source = os.path.abspath(job.source)
+        title, ext = os.path.splitext(os.path.basename(source))
+        upload_dir = os.path.abspath(self.upload_dir)
+        # A file already in upload_dir is used in place; it stays the user's, never the cache's to evict
+        owned = not source.startswith(upload_dir + os.sep)
+        raw_path = source
+        if owned:
+            # Named per source path, as LocalDownloader.fetch does, so two song.wav uploads never collide
+            source_id = hashlib.sha1(source.encode("utf-8")).hexdigest()[:11]
+            raw_path = os.path.join(upload_dir, f"{title} [{source_id}]{ext}")
+            self.upload_copies.add(raw_path)
+        os.makedirs(upload_dir, exist_ok=True)
+        async with self._disk:
+            if owned:
+                await _in_thread(shutil.copy, source, raw_path)
+            sha1 = await _in_thread(self.cache.add_raw, f"upload:{source}", job.source, raw_path, title, owned)
+        cached_vocals = await _in_thread(self.cache.lookup_vocals, sha1, dp.SEPARATION_PARAMS)
+        return raw_path, title, sha1, cached_vocals
+
+    async def _separation_worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job, raw_path, title, sha1 = await self._separation_queue.get()
+            try:
+                if job.separated.done():
+                    continue  # cancelled while waiting in the queue
+                self._emit(job, "separating")
+                vocal_path, seconds = await loop.run_in_executor(
+                    self._separators, self.separate, raw_path, title, dp.vocals_filename(title, sha1))
+                if not vocal_path:
+                    raise RuntimeError("Vocal extraction failed")
+                # Recorded even if the job was cancelled meanwhile: the stem is valid
+                async with self._disk:
+                    await _in_thread(dp.finish_stage, self.cache, sha1, vocal_path)
+                if not job.separated.done():
+                    job.separated.set_result(vocal_path)
+            except Exception as e:
+                if not job.separated.done():
+                    job.separated.set_exception(e)
+            finally:
+                self._separation_queue.task_done()
+
+
+# ---------------------
+# INPUTS
+# ---------------------
+async def _read_stdin(service):
+    """Submit every line typed or piped in (a URL or a file path) until EOF."""
+    loop = asyncio.get_running_loop()
+    lines = asyncio.Queue()
+
+    def reader():
+        # Daemon thread: a blocked readline() must not keep the process alive on Ctrl+C
+        for line in sys.stdin:
+            loop.call_soon_threadsafe(lines.put_nowait, line)
+        loop.call_soon_threadsafe(lines.put_nowait, None)
+
+    threading.Thread(target=reader, daemon=True).start()
+    while True:
+        line = await lines.get()
+        if line is None:
+            return
+        if line.strip():
+            await service.submit(line.strip())
+
+
+async def _watch(service, directory, interval=WATCH_INTERVAL):
+    """Submit audio files dropped into directory, once their size has stopped changing."""
+    seen, sizes = set(), {}
+    while True:
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if path in seen or not name.lower().endswith(AUDIO_EXTENSIONS):
+                continue
+            if os.path.abspath(path) in service.upload_copies:
+                continue  # the service's own copy of an upload, when watching upload_dir
+            size = os.path.getsize(path)
+            if sizes.get(path) == size:
+                seen.add(path)
+                await service.submit(path)
+            sizes[path] = size
+        await asyncio.sleep(interval)
+
+
+async def run(args):
+    downloader = LocalDownloader(args.local) if args.local else YoutubeDownloader()
+    start = time.perf_counter()
+    async with IngestService(downloader, download_workers=args.download_workers,
+                             separation_workers=args.separation_workers, queue_size=args.queue_size,
+                             analysis_workers=args.analysis_workers, analyze=not args.no_analysis,
+                             engine=args.engine) as service:
+        producers = []
+        if args.stdin:
+            producers.append(_read_stdin(service))
+        if args.watch:
+            producers.append(_watch(service, args.watch))
+        if args.urls:
+            with open(args.urls, "r") as f:
+                for line in f:
+                    if line.strip():
+                        await service.submit(line.strip())
+        await asyncio.gather(*producers)
+        await service.join()
+
+    stages = service.summary()
+    print(f"\n=== ALL DONE in {time.perf_counter() - start:.1f}s: "
+          + ", ".join(f"{count} {stage}" for stage, count in sorted(stages.items())) + " ===")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Continuously ingest song URLs and uploaded files.")
+    parser.add_argument("--urls", help="File with one URL per line to submit at start")
+    parser.add_argument("--stdin", action="store_true", help="Keep reading URLs / file paths from stdin")
+    parser.add_argument("--watch", help="Upload folder to watch for new audio files (runs until Ctrl+C)")
+    parser.add_argument("--local", help="Serve URLs from this folder instead of downloading (no network)")
+    parser.add_argument("--download-workers", type=int, default=4)
+    parser.add_argument("--separation-workers", type=int, default=2)
+    parser.add_argument("--queue-size", type=int, default=4, help="Songs waiting for separation")
+    parser.add_argument("--analysis-workers", type=int, default=1)
+    parser.add_argument("--engine", default="yin", help="Pitch engine for the analysis stage")
+    parser.add_argument("--no-analysis", action="store_true")
+    args = parser.parse_args(argv)
+    if not (args.urls or args.stdin or args.watch):
+        parser.error("nothing to ingest: give --urls, --stdin and/or --watch")
+
+    dp.freeze_support()
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        print("\n🛑 Stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+import os
+import sys
+import json
+import time
+import threading
+from functools import wraps
+
+# Setting VOCAL_TRACE=<file> enables tracing at import, in this process and in every
+# worker process it starts (they inherit the environment and append to the same file).
+TRACE_ENV = "VOCAL_TRACE"
+
+_enabled = False
+_path = None
+_lock = threading.Lock()
+_local = threading.local()
+_events = []  # spans and counters of this process, for summary()
+
+
+def peak_rss_mb():
+    """High-water mark of this process's resident memory, or None where unavailable."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, kilobytes on Linux
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def enable(path=None, truncate=False):
+    """
+    Start recording spans and counters. Events are appended to `path` as JSON lines
+    (when given) and kept in memory for summary().
+    :param truncate: start a new trace file instead of appending to an earlier run's.
+    """
+    global _enabled, _path
+    _path = path
+    _enabled = True
+    if path:
+        if truncate:
+            open(path, "w").close()
+        os.environ[TRACE_ENV] = os.path.abspath(path)
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def _emit(event):
+    with _lock:
+        _events.append(event)
+        if _path:
+            with open(_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(event) + "\n")
+
+
+# ---------------------
+# SPANS
+# ---------------------
+class _NullSpan:
+    """What span() returns while tracing is off: every operation is a no-op."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, **fields):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """
+    Timed stage. Numeric fields given to add() accumulate (audio_seconds, bytes_read,
+    bytes_written, ...); other fields are stored as they are.
+    """
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = fields
+
+    def add(self, **fields):
+        for key, value in fields.items():
+            if isinstance(value, (int, float)) and isinstance(self.fields.get(key), (int, float)):
+                self.fields[key] += value
+            else:
+                self.fields[key] = value
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        self._rss = peak_rss_mb()
+        self._wall = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._start
+        _local.stack.pop()
+        rss = peak_rss_mb()
+        event = {
+            "type": "span",
+            "name": self.name,
+            "parent": self.parent,
+            "start": self._wall,
+            "duration": duration,
+            "peak_rss_delta_mb": rss - self._rss if rss is not None else None,
+            "peak_rss_mb": rss,
+            "pid": os.getpid(),
+            "thread": threading.current_thread().name,
+        }
+        if exc_type is not None:
+            event["error"] = exc_type.__name__
+        event.update(self.fields)
+        _emit(event)
+        return False
+
+
+def span(name, **fields):
+    """
+    Context manager timing one stage:
+        with span("decode", path=path) as s:
+            ...
+            s.add(audio_seconds=len(y) / sr, bytes_read=os.path.getsize(path))
+    Returns a shared no-op object when tracing is disabled.
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    return Span(name, fields)
+
+
+def traced(name=None):
+    """Decorator form of span(); the function name is used when no name is given."""
+    def decorate(func):
+        label = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with Span(label, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def counter(name, value=1, **fields):
+    """Count an event (cache hit, dropped block, ...)."""
+    if not _enabled:
+        return
+    event = {"type": "counter", "name": name, "value": value, "start": time.time(), "pid": os.getpid()}
+    event.update(fields)
+    _emit(event)
+
+
+# ---------------------
+# SUMMARY
+# ---------------------
+def load_events(path):
+    """Events written to a JSON lines trace file (by this and any worker process)."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def summary(events=None):
+    """
+    Per-name totals: count, total/mean/max duration, audio seconds, bytes and the
+    largest peak-RSS growth seen in one span. Counters only get count and value.
+    """
+    if events is None:
+        with _lock:
+            events = list(_events)
+    rows = {}
+    for event in events:
+        row = rows.setdefault(event["name"], {
+            "type": event["type"], "count": 0, "total": 0.0, "max": 0.0, "value": 0,
+            "audio_seconds": 0.0, "bytes_read": 0, "bytes_written": 0, "peak_rss_delta_mb": 0.0,
+        })
+        row["count"] += 1
+        if event["type"] == "counter":
+            row["value"] += event["value"]
+            continue
+        row["total"] += event["duration"]
+        row["max"] = max(row["max"], event["duration"])
+        row["audio_seconds"] += event.get("audio_seconds", 0.0)
+        row["bytes_read"] += event.get("bytes_read", 0)
+        row["bytes_written"] += event.get("bytes_written", 0)
+        row["peak_rss_delta_mb"] = max(row["peak_rss_delta_mb"], event.get("peak_rss_delta_mb") or 0.0)
+    for row in rows.values():
+        row["mean"] = row["total"] / row["count"] if row["count"] else 0.0
+    return rows
+
+
+def print_summary(events=None):
+    """End-of-run table, slowest stages first. Reads the trace file so worker processes are included."""
+    if events is None and _path and os.path.exists(_path):
+        events = load_events(_path)
+    rows = summary(events)
+    if not rows:
+        return
+
+    print(f"\n{'stage':<28} {'count':>6} {'total (s)':>10} {'mean (s)':>9} {'max (s)':>8} "
+          f"{'x realtime':>10} {'read (MB)':>10} {'written (MB)':>12} {'peak +MB':>9}")
+    spans = sorted(((n, r) for n, r in rows.items() if r["type"] == "span"), key=lambda item: -item[1]["total"])
+    for name, r in spans:
+        speed = f"{r['audio_seconds'] / r['total']:.1f}" if r["audio_seconds"] and r["total"] else "-"
+        print(f"{name:<28} {r['count']:>6} {r['total']:>10.2f} {r['mean']:>9.3f} {r['max']:>8.2f} {speed:>10} "
+              f"{r['bytes_read'] / 1024 ** 2:>10.1f} {r['bytes_written'] / 1024 ** 2:>12.1f} {r['peak_rss_delta_mb']:>9.0f}")
+    for name, r in rows.items():
+        if r["type"] == "counter":
+            print(f"{name:<28} {r['count']:>6}   value {r['value']}")
+
+
+if os.environ.get(TRACE_ENV):
+    enable(os.environ[TRACE_ENV])
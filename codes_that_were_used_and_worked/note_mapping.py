@@ -0,0 +1,62 @@
+from collections import namedtuple
+import numpy as np
+
+A4_HZ = 440.0
+A4_MIDI = 69
+MIDI_RANGE = np.arange(128)
+
+NOTE_NAMES = np.array(['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B'])
+SOLFEGE_NAMES = np.array(['Do', 'Do#', 'Re', 'Re#', 'Mi', 'Fa', 'Fa#', 'Sol', 'Sol#', 'La', 'La#', 'Si'])
+
+# One label per MIDI note, plus a trailing '' that index -1 (unvoiced) picks up
+_NAME_TABLE = np.append(np.char.add(NOTE_NAMES[MIDI_RANGE % 12], (MIDI_RANGE // 12 - 1).astype(str)), '')
+_SOLFEGE_TABLE = np.append(SOLFEGE_NAMES[MIDI_RANGE % 12], '')
+
+NoteContour = namedtuple("NoteContour", ["midi", "name", "solfege", "cents"])
+
+
+def note_table(a4=A4_HZ):
+    """
+    Equal-temperament table: (frequencies of MIDI 0..127, decision boundaries).
+    Boundaries sit halfway between neighbouring notes in log-frequency (the
+    geometric mean), so searchsorted over them gives the nearest note.
+    """
+    freqs = a4 * 2.0 ** ((MIDI_RANGE - A4_MIDI) / 12.0)
+    boundaries = np.sqrt(freqs[:-1] * freqs[1:])
+    return freqs, boundaries
+
+
+_FREQS, _BOUNDARIES = note_table()
+
+
+def map_contour(f0, a4=A4_HZ):
+    """
+    Nearest note for every frame of a pitch contour.
+    :param f0: array of frequencies in Hz; NaN (or <= 0) marks unvoiced frames.
+    :return: NoteContour of arrays shaped like f0: midi (-1 when unvoiced),
+             name ('A4', '' when unvoiced), solfège syllable ('La', '' when unvoiced)
+             and cents deviation from the note (NaN when unvoiced).
+    """
+    f0 = np.asarray(f0, dtype=np.float64)
+    freqs, boundaries = (_FREQS, _BOUNDARIES) if a4 == A4_HZ else note_table(a4)
+
+    voiced = f0 > 0  # False for NaN as well
+    midi = np.searchsorted(boundaries, np.where(voiced, f0, 1.0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cents = np.where(voiced, 1200.0 * np.log2(f0 / freqs[midi]), np.nan)
+    midi = np.where(voiced, midi, -1)
+    return NoteContour(midi, _NAME_TABLE[midi], _SOLFEGE_TABLE[midi], cents)
+
+
+def hz_to_cents(f0):
+    """Absolute pitch in cents (MIDI note * 100), NaN where unvoiced."""
+    f0 = np.asarray(f0, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(f0 > 0, 6900.0 + 1200.0 * np.log2(f0 / A4_HZ), np.nan)
+
+
+def nearest_note(hz, a4=A4_HZ):
+    """Solfège syllable of one frequency, or None when there is no pitch."""
+    if hz is None or not hz > 0:
+        return None
+    return str(map_contour([hz], a4).solfege[0])
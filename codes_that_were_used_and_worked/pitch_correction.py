@@ -0,0 +1,262 @@
+import time
+import argparse
+from collections import deque
+import numpy as np
+import soundfile as sf
+from pitch_tracker import yin_frames, FMIN, FMAX
+from note_mapping import hz_to_cents
+
+MAJOR_SCALE = (0, 2, 4, 5, 7, 9, 11)  # pitch classes relative to the key
+
+
+class StreamingPitchCorrector:
+    """
+    Block-based phase-vocoder pitch corrector.
+    Every hop_length input samples one frame_length frame is analysed: YIN gives its
+    f0, the target is the nearest allowed note (or the reference contour at that time),
+    and the frame's spectrum is shifted by the target/f0 ratio before overlap-add.
+    process() returns exactly as many samples as it is given, delayed by a fixed
+    algorithmic_latency, so it can sit inside an audio callback or be fed WAV blocks offline.
+    """
+
+    def __init__(self, sample_rate=44100, frame_length=1024, hop_length=256, strength=1.0,
+                 key=None, scale=MAJOR_SCALE, reference=None, max_shift_cents=300.0,
+                 fmin=FMIN, fmax=FMAX, threshold=0.15, history=4096):
+        """
+        :param strength: 0 leaves the voice untouched, 1 snaps it fully onto the target.
+        :param key: pitch class (0 = C) of the scale to snap to; None snaps to any semitone.
+        :param reference: optional (times, f0) contour of the reference vocals; its pitch
+                          (moved to the singer's octave) is the target wherever it is voiced.
+        :param max_shift_cents: larger corrections are treated as detection errors and skipped.
+        """
+        if frame_length % hop_length:
+            raise ValueError("frame_length must be a multiple of hop_length")
+        self.sample_rate = sample_rate
+        self.frame_length = frame_length
+        self.hop_length = hop_length
+        self.strength = strength
+        self.max_shift_cents = max_shift_cents
+        self.fmin = fmin
+        self.fmax = fmax
+        self.threshold = threshold
+
+        # Allowed pitch classes for snapping
+        self._allowed = np.zeros(12, dtype=bool)
+        if key is None:
+            self._allowed[:] = True
+        else:
+            self._allowed[(np.asarray(scale) + key) % 12] = True
+
+        self._reference = None
+        if reference is not None:
+            ref_times, ref_f0 = reference
+            self._reference = (np.asarray(ref_times, dtype=np.float64), hz_to_cents(ref_f0))
+
+        self._window = np.hanning(frame_length + 1)[:-1]  # periodic Hann
+        # Hann analysis and synthesis windows overlap-add to this constant gain
+        self._ola_gain = np.sum(self._window ** 2) / hop_length
+        bins = frame_length // 2 + 1
+        self._bins = np.arange(bins)
+        self._omega = 2 * np.pi * self._bins * hop_length / frame_length  # expected phase advance per hop
+
+        self.corrections = deque(maxlen=history)  # (time, f0, target, ratio) per frame
+        self.reset()
+
+    def reset(self):
+        self._input = np.zeros(self.frame_length, dtype=np.float64)  # newest frame_length samples
+        self._filled = 0  # samples received since the last analysed hop
+        self._accumulator = np.zeros(self.frame_length, dtype=np.float64)  # overlap-add tail
+        # Output FIFO. One hop of silence up front means a block never has to wait for a
+        # hop that is still incomplete; with the frame_length - hop_length overlap-add
+        # delay that makes the total latency exactly one frame
+        self._output = np.zeros(4 * self.frame_length, dtype=np.float32)
+        self._output_len = self.hop_length
+        self._last_phase = np.zeros(len(self._bins))
+        self._synth_phase = np.zeros(len(self._bins))
+        self._frames = 0
+        self.blocks = 0
+        self.compute_seconds = 0.0
+        self.max_block_seconds = 0.0
+        self.corrections.clear()
+
+    @property
+    def algorithmic_latency(self):
+        """Seconds between a sample entering process() and coming out corrected: one frame."""
+        return self.frame_length / self.sample_rate
+
+    # ---------------------
+    # TARGETS
+    # ---------------------
+    def _target_cents(self, cents, t):
+        """Target pitch (cents) for a frame sung at `cents` at time t."""
+        if self._reference is not None:
+            ref_times, ref_cents = self._reference
+            target = np.interp(t, ref_times, ref_cents, left=np.nan, right=np.nan)
+            if not np.isnan(target):
+                # Same note, in the octave the singer is using
+                return target + 1200.0 * np.round((cents - target) / 1200.0)
+        candidates = np.round(cents / 100.0) + np.arange(-2, 3)
+        candidates = candidates[self._allowed[candidates.astype(int) % 12]]
+        return 100.0 * candidates[np.argmin(np.abs(100.0 * candidates - cents))]
+
+    def _ratio(self, frame, t):
+        f0, voiced = yin_frames(frame[None, :], self.sample_rate, self.fmin, self.fmax, self.threshold)
+        if not voiced[0]:
+            self.corrections.append((t, np.nan, np.nan, 1.0))
+            return 1.0
+        cents = hz_to_cents(f0)[0]
+        target = self._target_cents(cents, t)
+        shift = self.strength * (target - cents)
+        if abs(shift) > self.max_shift_cents:
+            shift = 0.0
+        ratio = 2.0 ** (shift / 1200.0)
+        self.corrections.append((t, float(f0[0]), float(440.0 * 2.0 ** ((target - 6900.0) / 1200.0)), ratio))
+        return ratio
+
+    # ---------------------
+    # PHASE VOCODER
+    # ---------------------
+    def _shift_frame(self, frame, ratio):
+        spectrum = np.fft.rfft(frame * self._window)
+        magnitude = np.abs(spectrum)
+        phase = np.angle(spectrum)
+
+        if abs(ratio - 1.0) < 1e-6:
+            # Nothing to correct: resynthesize the frame as is and re-seed the phases
+            self._synth_phase = phase
+            shifted = spectrum
+        else:
+            # True frequency of every bin from its phase advance since the last hop
+            delta = phase - self._last_phase - self._omega
+            delta -= 2 * np.pi * np.round(delta / (2 * np.pi))
+            advance = (self._omega + delta) * ratio
+
+            # Move each bin's energy to bin k * ratio and advance its phase at the new frequency
+            target = np.round(self._bins * ratio).astype(int)
+            valid = target < len(self._bins)
+            new_magnitude = np.bincount(target[valid], weights=magnitude[valid], minlength=len(self._bins))
+            new_advance = np.zeros(len(self._bins))
+            new_advance[target[valid]] = advance[valid]
+            self._synth_phase = self._synth_phase + new_advance
+            shifted = new_magnitude * np.exp(1j * self._synth_phase)
+
+        self._last_phase = phase
+        return np.fft.irfft(shifted, self.frame_length) * self._window / self._ola_gain
+
+    def _push_output(self, samples):
+        end = self._output_len + len(samples)
+        if end > len(self._output):
+            grown = np.zeros(2 * end, dtype=np.float32)
+            grown[:self._output_len] = self._output[:self._output_len]
+            self._output = grown
+        self._output[self._output_len:end] = samples
+        self._output_len = end
+
+    def process(self, block):
+        """
+        Correct one block (1-D, or (frames, channels) from sounddevice; channel 0 is used).
+        :return: float32 array with len(block) corrected samples, algorithmic_latency late.
+        """
+        start = time.perf_counter()
+        block = np.asarray(block, dtype=np.float64)
+        if block.ndim > 1:
+            block = block[:, 0]
+
+        hop = self.hop_length
+        pos = 0
+        while pos < len(block):
+            take = min(hop - self._filled, len(block) - pos)
+            self._input[:-take] = self._input[take:]
+            self._input[-take:] = block[pos:pos + take]
+            self._filled += take
+            pos += take
+            if self._filled < hop:
+                break
+
+            # One full hop arrived: analyse the newest frame and overlap-add it
+            self._filled = 0
+            t = (self._frames * hop + hop - self.frame_length / 2) / self.sample_rate  # frame centre
+            self._frames += 1
+            self._accumulator += self._shift_frame(self._input, self._ratio(self._input, t))
+            self._push_output(self._accumulator[:hop].astype(np.float32))
+            self._accumulator[:-hop] = self._accumulator[hop:]
+            self._accumulator[-hop:] = 0.0
+
+        n = len(block)
+        out = self._output[:n].copy()
+        self._output[:self._output_len - n] = self._output[n:self._output_len]
+        self._output_len -= n
+
+        elapsed = time.perf_counter() - start
+        self.blocks += 1
+        self.compute_seconds += elapsed
+        self.max_block_seconds = max(self.max_block_seconds, elapsed)
+        return out
+
+    def latency_report(self, block_size=1024):
+        """Measured per-block compute against the real-time budget of one block."""
+        budget = block_size / self.sample_rate
+        mean = self.compute_seconds / self.blocks if self.blocks else 0.0
+        voiced = [c for c in self.corrections if not np.isnan(c[1])]
+        return {
+            "algorithmic_latency_ms": 1000 * self.algorithmic_latency,
+            "mean_block_ms": 1000 * mean,
+            "max_block_ms": 1000 * self.max_block_seconds,
+            "block_budget_ms": 1000 * budget,
+            "worst_case_load": self.max_block_seconds / budget if budget else 0.0,
+            "mean_abs_correction_cents": float(np.mean([abs(1200 * np.log2(c[3])) for c in voiced])) if voiced else 0.0,
+        }
+
+
+def process_file(input_path, output_path, block_size=1024, corrector=None, **kwargs):
+    """
+    Offline run of the real-time path: feed a WAV file through process() block by block.
+    The output is shifted back by the algorithmic latency so it lines up with the input.
+    :return: the corrector (for corrections and latency_report()).
+    """
+    info = sf.info(input_path)
+    corrector = corrector or StreamingPitchCorrector(info.samplerate, **kwargs)
+    latency = corrector.frame_length
+    skip = latency
+
+    with sf.SoundFile(output_path, "w", samplerate=info.samplerate, channels=1, subtype="PCM_16") as dst:
+        blocks = sf.blocks(input_path, blocksize=block_size, dtype="float32", always_2d=True)
+        # Trailing silence flushes the last latency worth of samples out of the corrector
+        tail = np.zeros((latency, 1), dtype=np.float32)
+        for block in list(blocks) + [tail]:
+            out = corrector.process(block)
+            if skip:
+                dropped = min(skip, len(out))
+                out = out[dropped:]
+                skip -= dropped
+            dst.write(out)
+    return corrector
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline run of the streaming pitch corrector.")
+    parser.add_argument("input", help="Vocal take (WAV)")
+    parser.add_argument("output", help="Corrected WAV")
+    parser.add_argument("--reference", help="Reference vocals to follow instead of the nearest note")
+    parser.add_argument("--key", type=int, default=None, help="Snap to this major key (0 = C) instead of any semitone")
+    parser.add_argument("--strength", type=float, default=1.0)
+    parser.add_argument("--block-size", type=int, default=1024)
+    args = parser.parse_args(argv)
+
+    reference = None
+    if args.reference:
+        from pitch_scoring import extract_contour
+        reference = extract_contour(args.reference)
+
+    corrector = process_file(args.input, args.output, args.block_size, strength=args.strength,
+                             key=args.key, reference=reference)
+    report = corrector.latency_report(args.block_size)
+    print(f"✅ Corrected take saved to {args.output}")
+    print(f"🎵 {report['algorithmic_latency_ms']:.1f} ms algorithmic latency, "
+          f"mean block {report['mean_block_ms']:.2f} ms, worst {report['max_block_ms']:.2f} ms "
+          f"of {report['block_budget_ms']:.2f} ms budget, "
+          f"mean correction {report['mean_abs_correction_cents']:.1f} cents")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import numpy as np
+from pitch_tracker import yin_frames, FMIN, FMAX
+
+# librosa is imported lazily: the yin backend only needs NumPy/SciPy.
+
+
+class PitchEngine:
+    """Common interface: estimate(y, sr) -> (times, f0, voiced), f0 is NaN where unvoiced."""
+
+    name = None
+
+    def __init__(self, fmin=FMIN, fmax=FMAX):
+        self.fmin = fmin
+        self.fmax = fmax
+
+    def estimate(self, y, sr):
+        raise NotImplementedError
+
+    def median_pitch(self, y, sr):
+        """Median f0 over voiced frames, or None when nothing is voiced."""
+        _, f0, _ = self.estimate(y, sr)
+        valid_f0 = f0[~np.isnan(f0)]
+        return float(np.median(valid_f0)) if len(valid_f0) else None
+
+
+class PyinEngine(PitchEngine):
+    """librosa.pyin at the input rate: accurate, slowest."""
+
+    name = "pyin"
+
+    def __init__(self, fmin=FMIN, fmax=FMAX, frame_length=2048):
+        super().__init__(fmin, fmax)
+        self.frame_length = frame_length
+
+    def estimate(self, y, sr):
+        import librosa
+        f0, voiced_flag, _ = librosa.pyin(y, fmin=self.fmin, fmax=self.fmax, sr=sr,
+                                          frame_length=self.frame_length, pad_mode='constant')
+        times = librosa.times_like(f0, sr=sr, hop_length=self.frame_length // 4)
+        return times, f0, voiced_flag
+
+
+class PiptrackEngine(PitchEngine):
+    """librosa.piptrack + per-frame argmax magnitude: fast, noisy (the test/voiceid version)."""
+
+    name = "piptrack"
+
+    def __init__(self, fmin=FMIN, fmax=FMAX, hop_length=512):
+        super().__init__(fmin, fmax)
+        self.hop_length = hop_length
+
+    def estimate(self, y, sr):
+        import librosa
+        pitches, magnitudes = librosa.piptrack(y=y, sr=sr, fmin=self.fmin, fmax=self.fmax,
+                                               hop_length=self.hop_length)
+        f0 = pitches[magnitudes.argmax(axis=0), np.arange(pitches.shape[1])]
+        voiced = f0 > 0
+        f0 = np.where(voiced, f0, np.nan)
+        times = np.arange(len(f0)) * self.hop_length / sr
+        return times, f0, voiced
+
+
+class YinEngine(PitchEngine):
+    """
+    Fully vectorized NumPy YIN run at a reduced analysis rate (16 kHz by default).
+    All frames are analysed in one batch of FFTs; no per-frame Python loop.
+    """
+
+    name = "yin"
+
+    def __init__(self, fmin=FMIN, fmax=FMAX, analysis_sr=16000, frame_length=1024, hop_length=256,
+                 threshold=0.15, max_frames_per_batch=2048):
+        super().__init__(fmin, fmax)
+        self.analysis_sr = analysis_sr
+        self.frame_length = frame_length
+        self.hop_length = hop_length
+        self.threshold = threshold
+        self.max_frames_per_batch = max_frames_per_batch
+
+    def estimate(self, y, sr):
+        y = np.asarray(y, dtype=np.float32)
+        if sr != self.analysis_sr:
+            from scipy.signal import resample_poly
+            g = np.gcd(int(sr), int(self.analysis_sr))
+            y = resample_poly(y, self.analysis_sr // g, int(sr) // g).astype(np.float32)
+        # Centre the frames like librosa so times line up with the other backends
+        y = np.pad(y, self.frame_length // 2)
+        if len(y) < self.frame_length:
+            return np.empty(0), np.empty(0), np.empty(0, dtype=bool)
+
+        frames = np.lib.stride_tricks.sliding_window_view(y, self.frame_length)[::self.hop_length]
+        f0 = np.empty(len(frames))
+        voiced = np.empty(len(frames), dtype=bool)
+        # Batches bound the temporary FFT buffers on long inputs
+        for i in range(0, len(frames), self.max_frames_per_batch):
+            batch = slice(i, i + self.max_frames_per_batch)
+            f0[batch], voiced[batch] = yin_frames(frames[batch], self.analysis_sr, self.fmin, self.fmax, self.threshold)
+        times = np.arange(len(f0)) * self.hop_length / self.analysis_sr
+        return times, f0, voiced
+
+
+ENGINES = {engine.name: engine for engine in (PyinEngine, PiptrackEngine, YinEngine)}
+
+
+def get_engine(name="pyin", **kwargs):
+    """Instantiate a pitch backend by name: 'pyin', 'piptrack' or 'yin'."""
+    if isinstance(name, PitchEngine):
+        return name
+    try:
+        return ENGINES[name](**kwargs)
+    except KeyError:
+        raise ValueError(f"Unknown pitch engine {name!r}, choose from {sorted(ENGINES)}") from None
@@ -0,0 +1,228 @@
+import json
+import argparse
+import numpy as np
+import audio_loader
+from pitch_engine import get_engine
+from note_mapping import map_contour, hz_to_cents
+
+BAND_SECONDS = 1.0  # how far (in time) the take may run ahead of or behind the reference
+UNVOICED_COST = 200.0  # cents charged when only one of the two frames is voiced
+TOLERANCE_CENTS = 50.0  # a frame within a quarter tone of the reference counts as in tune
+STEP_PENALTY = 50.0  # cents added to every non-diagonal step, so the path doesn't stall on cheap frames
+MIN_NOTE_FRAMES = 3  # shorter reference notes are glides, not notes
+
+
+# ---------------------
+# CONTOURS
+# ---------------------
+def extract_contour(source, sr=None, engine="yin"):
+    """
+    (times, f0) of a file path or a mono/(frames, channels) waveform sampled at sr.
+    f0 is NaN where the frame is unvoiced.
+    """
+    if isinstance(source, str):
+        y, sr = audio_loader.load(source)
+    else:
+        y = np.asarray(source, dtype=np.float32)
+        if y.ndim == 2:
+            y = y.mean(axis=1)
+    times, f0, _ = get_engine(engine).estimate(y, sr)
+    return times, f0
+
+
+def cents_difference(a, b, fold_octaves=True):
+    """a - b in cents; folded to [-600, 600) when singing an octave away is acceptable."""
+    d = a - b
+    if fold_octaves:
+        d = (d + 600.0) % 1200.0 - 600.0
+    return d
+
+
+# ---------------------
+# BANDED DTW
+# ---------------------
+def _band_limits(n, m, band):
+    """First column of the Sakoe-Chiba band for every row (the band follows the n x m diagonal)."""
+    width = min(2 * band + 1, m)
+    centre = np.round(np.arange(n) * ((m - 1) / max(n - 1, 1))).astype(int)
+    return np.clip(centre - band, 0, m - width), width
+
+
+def _frame_costs(x, y, fold_octaves):
+    """Cost matrix rows: |cents error|, 0 if both unvoiced, UNVOICED_COST if only one is."""
+    d = np.abs(cents_difference(x, y, fold_octaves))
+    x_voiced, y_voiced = ~np.isnan(x), ~np.isnan(y)
+    return np.where(x_voiced & y_voiced, d, np.where(x_voiced == y_voiced, 0.0, UNVOICED_COST))
+
+
+def banded_dtw(x, y, band, fold_octaves=True, step_penalty=STEP_PENALTY):
+    """
+    DTW between two cents contours restricted to a Sakoe-Chiba band: O(len(x) * band).
+    Rows are computed one at a time, each fully vectorized: with
+    A[j] = c[j] + min(D[i-1, j-1], D[i-1, j] + p), the horizontal step makes
+    D[i, j] = C[j] + min_{k <= j}(A[k] - C[k]) where C is the row's cumulative sum of
+    c + p, i.e. a cumsum and a minimum.accumulate instead of a loop over j.
+    :return: (path_x, path_y, total_cost).
+    """
+    n, m = len(x), len(y)
+    band = max(int(band), int(np.ceil(m / n)))  # the band must be wide enough to reach (n-1, m-1)
+    lo, width = _band_limits(n, m, band)
+    costs = _frame_costs(x[:, None], y[lo[:, None] + np.arange(width)], fold_octaves)
+    shifts = np.diff(lo, prepend=0)
+
+    from_previous_row = np.empty((n, width), dtype=bool)
+    from_up = np.empty((n, width), dtype=bool)
+    padded = np.full(2 * width + 2, np.inf)  # previous row in band coordinates, inf outside
+    row = np.full(width, np.inf)
+    row[0] = 0.0
+    for i in range(n):
+        c = costs[i]
+        s = shifts[i]
+        if i == 0:
+            up, diag = row, np.full(width, np.inf)
+        else:
+            padded[1:width + 1] = row
+            up = padded[s + 1:s + 1 + width] + step_penalty
+            diag = padded[s:s + width]
+        A = c + np.minimum(up, diag)
+        C = np.cumsum(c + step_penalty)
+        offset = A - C
+        best = np.minimum.accumulate(offset)
+        row = C + best
+        np.equal(offset, best, out=from_previous_row[i])
+        np.greater(diag, up, out=from_up[i])
+    total = float(row[m - 1 - lo[n - 1]])
+
+    # Step taken into every cell: 0 diagonal, 1 vertical, 2 horizontal
+    steps = np.where(from_previous_row, from_up, 2).astype(np.int8)
+
+    # Backtrack from the top-right corner
+    i, j = n - 1, m - 1
+    path_x, path_y = [i], [j]
+    while i > 0 or j > 0:
+        step = steps[i, j - lo[i]]
+        if step == 0:
+            i, j = i - 1, j - 1
+        elif step == 1:
+            i -= 1
+        else:
+            j -= 1
+        path_x.append(i)
+        path_y.append(j)
+    return np.array(path_x[::-1]), np.array(path_y[::-1]), total
+
+
+# ---------------------
+# SCORING
+# ---------------------
+def _note_segments(midi):
+    """(start, stop, midi) runs of the same voiced note in a reference contour."""
+    change = np.flatnonzero(np.diff(midi)) + 1
+    starts = np.concatenate(([0], change))
+    stops = np.concatenate((change, [len(midi)]))
+    keep = (midi[starts] >= 0) & (stops - starts >= MIN_NOTE_FRAMES)
+    return starts[keep], stops[keep], midi[starts[keep]]
+
+
+def score_contours(take_times, take_f0, ref_times, ref_f0, band_seconds=BAND_SECONDS, fold_octaves=True):
+    """
+    Align the take to the reference and measure pitch and timing accuracy.
+    :return: dict with the overall score (0-100, share of voiced reference frames sung
+             within TOLERANCE_CENTS), per-frame cents error (NaN where either is unvoiced),
+             per-note errors, timing offset and drift.
+    """
+    x, y = hz_to_cents(take_f0), hz_to_cents(ref_f0)
+    if len(x) == 0 or len(y) == 0:
+        raise ValueError("Empty pitch contour")
+    frame_period = ref_times[1] - ref_times[0] if len(ref_times) > 1 else 1.0
+    px, py, cost = banded_dtw(x, y, int(round(band_seconds / frame_period)), fold_octaves)
+
+    error = cents_difference(x[px], y[py], fold_octaves)  # NaN unless both frames are voiced
+    ref_voiced = ~np.isnan(y[py])
+    in_tune = np.abs(error) <= TOLERANCE_CENTS
+    score = 100.0 * float(np.mean(in_tune[ref_voiced])) if ref_voiced.any() else 0.0
+
+    # One error per reference frame (its first match on the path)
+    _, first = np.unique(py, return_index=True)
+    frame_error = error[first]
+
+    # Timing: how far behind (+) or ahead (-) the reference the singer is along the path
+    lag = take_times[px] - ref_times[py]
+    drift = np.polyfit(ref_times[py], lag, 1)[0] if len(np.unique(py)) > 1 else 0.0
+
+    notes = []
+    starts, stops, midis = _note_segments(map_contour(ref_f0).midi)
+    names = map_contour(440.0 * 2.0 ** ((midis - 69) / 12.0)).name
+    for start, stop, name in zip(starts, stops, names):
+        e = frame_error[start:stop]
+        e = e[~np.isnan(e)]
+        notes.append({
+            "note": str(name),
+            "start": float(ref_times[start]),
+            "end": float(ref_times[stop - 1]),
+            "mean_cents": float(np.mean(e)) if len(e) else None,
+            "mean_abs_cents": float(np.mean(np.abs(e))) if len(e) else None,
+            "sung_ratio": float(len(e) / (stop - start)),
+        })
+
+    voiced_error = frame_error[~np.isnan(frame_error)]
+    return {
+        "score": score,
+        "mean_abs_cents": float(np.mean(np.abs(voiced_error))) if len(voiced_error) else None,
+        "median_cents": float(np.median(voiced_error)) if len(voiced_error) else None,
+        "timing_offset_seconds": float(np.median(lag)),
+        "drift_seconds_per_minute": float(drift * 60.0),
+        "dtw_cost": cost,
+        "frame_times": ref_times,
+        "frame_cents_error": frame_error,
+        "notes": notes,
+    }
+
+
+def score_take(take, reference, sr=None, engine="yin", band_seconds=BAND_SECONDS, fold_octaves=True):
+    """
+    Score a take against the reference vocals. Both can be paths or waveforms at sr
+    (e.g. the recorded file and LiveVocalRecorder.song_frames).
+    """
+    take_times, take_f0 = extract_contour(take, sr, engine)
+    ref_times, ref_f0 = extract_contour(reference, sr, engine)
+    return score_contours(take_times, take_f0, ref_times, ref_f0, band_seconds, fold_octaves)
+
+
+def print_report(result, max_notes=20):
+    print(f"🎯 Score: {result['score']:.1f}/100")
+    if result["mean_abs_cents"] is not None:
+        print(f"   Pitch: {result['mean_abs_cents']:.1f} cents mean error, {result['median_cents']:+.1f} cents median")
+    print(f"   Timing: {1000 * result['timing_offset_seconds']:+.0f} ms offset, "
+          f"{1000 * result['drift_seconds_per_minute']:+.0f} ms/min drift")
+    for note in result["notes"][:max_notes]:
+        if note["mean_cents"] is None:
+            print(f"   {note['start']:6.2f}s {note['note']:<4} not sung")
+        else:
+            print(f"   {note['start']:6.2f}s {note['note']:<4} {note['mean_cents']:+6.1f} cents")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a vocal take against the reference vocals.")
+    parser.add_argument("take", help="Recorded take")
+    parser.add_argument("reference", help="Reference vocals (e.g. reference_track_20s.wav)")
+    parser.add_argument("--engine", default="yin")
+    parser.add_argument("--band", type=float, default=BAND_SECONDS, help="Sakoe-Chiba band in seconds")
+    parser.add_argument("--exact-octave", action="store_true", help="Count octave errors as wrong notes")
+    parser.add_argument("--json", help="Write the report to this file")
+    args = parser.parse_args(argv)
+
+    result = score_take(args.take, args.reference, engine=args.engine, band_seconds=args.band,
+                        fold_octaves=not args.exact_octave)
+    print_report(result)
+
+    if args.json:
+        report = dict(result, frame_times=result["frame_times"].tolist(),
+                      frame_cents_error=[None if np.isnan(e) else float(e) for e in result["frame_cents_error"]])
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Report saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+import time
+from collections import deque
+import numpy as np
+
+# Same search range as detect_pitch(): C3..C6
+FMIN = 130.81
+FMAX = 1046.50
+
+
+def yin_frames(frames, sr, fmin=FMIN, fmax=FMAX, threshold=0.1):
+    """
+    Vectorized YIN over a (n_frames, frame_length) array.
+    The difference function is computed for all frames at once with an FFT
+    cross-correlation, so the cost is O(n_frames * frame_length * log(frame_length)).
+    :return: (f0, voiced) arrays of shape (n_frames,); f0 is NaN where unvoiced.
+    """
+    frames = np.atleast_2d(np.asarray(frames, dtype=np.float64))
+    n_frames, frame_length = frames.shape
+    tau_min = max(1, int(np.floor(sr / fmax)))
+    tau_max = min(int(np.ceil(sr / fmin)), frame_length // 2)
+    if n_frames == 0 or tau_max <= tau_min + 1:
+        return np.full(n_frames, np.nan), np.zeros(n_frames, dtype=bool)
+    w = frame_length - tau_max  # integration window
+
+    # r(tau) = sum_j x[j] * x[j + tau] over the integration window
+    n_fft = 1 << int(np.ceil(np.log2(frame_length + w)))
+    spec = np.fft.rfft(frames, n_fft, axis=1)
+    head = np.fft.rfft(frames[:, :w], n_fft, axis=1)
+    corr = np.fft.irfft(np.conj(head) * spec, n_fft, axis=1)[:, :tau_max + 1]
+
+    # d(tau) = e(0) + e(tau) - 2 r(tau) with sliding-window energies
+    energy = np.concatenate([np.zeros((n_frames, 1)), np.cumsum(frames ** 2, axis=1)], axis=1)
+    taus = np.arange(tau_max + 1)
+    e_tau = energy[:, taus + w] - energy[:, taus]
+    diff = np.maximum(energy[:, w:w + 1] + e_tau - 2.0 * corr, 0.0)
+    diff[:, 0] = 0.0
+
+    # Cumulative mean normalized difference
+    cmnd = np.ones_like(diff)
+    running = np.cumsum(diff[:, 1:], axis=1)
+    running[running == 0] = np.finfo(float).tiny
+    cmnd[:, 1:] = diff[:, 1:] * taus[1:] / running
+
+    # First trough below the threshold inside [tau_min, tau_max)
+    inner = cmnd[:, tau_min:tau_max]
+    left = cmnd[:, tau_min - 1:tau_max - 1]
+    right = cmnd[:, tau_min + 1:tau_max + 1]
+    candidates = (inner < threshold) & (inner <= left) & (inner < right)
+    voiced = candidates.any(axis=1)
+    best = tau_min + np.argmax(candidates, axis=1)
+
+    # Parabolic interpolation around the chosen lag
+    rows = np.arange(n_frames)
+    a = cmnd[rows, best - 1]
+    b = cmnd[rows, best]
+    c = cmnd[rows, best + 1]
+    denom = a - 2.0 * b + c
+    shift = np.where(np.abs(denom) > 1e-12, 0.5 * (a - c) / np.where(denom == 0, 1.0, denom), 0.0)
+    period = best + np.clip(shift, -1.0, 1.0)
+
+    f0 = np.where(voiced, sr / period, np.nan)
+    return f0, voiced
+
+
+class StreamingPitchTracker:
+    """
+    Incremental YIN pitch tracker fed with arbitrary-sized audio blocks.
+    Samples go into a fixed ring buffer; every hop_length new samples produce one
+    (time, f0, voiced) estimate. At most max_hops_per_block frames are analysed per
+    push() so the work done inside an audio callback stays bounded; if the tracker
+    falls behind, the oldest pending hops are skipped and counted in dropped_hops.
+    """
+
+    def __init__(self, sample_rate=44100, frame_length=2048, hop_length=512,
+                 fmin=FMIN, fmax=FMAX, threshold=0.1, max_hops_per_block=4, history=4096):
+        self.sample_rate = sample_rate
+        self.frame_length = frame_length
+        self.hop_length = hop_length
+        self.fmin = fmin
+        self.fmax = fmax
+        self.threshold = threshold
+        self.max_hops_per_block = max_hops_per_block
+
+        self._capacity = 1 << int(np.ceil(np.log2(2 * frame_length)))
+        self._ring = np.zeros(self._capacity, dtype=np.float32)
+        self._offsets = np.arange(-frame_length, 0)
+        self.estimates = deque(maxlen=history)
+        self.reset()
+
+    def reset(self):
+        self._ring[:] = 0.0
+        self._written = 0  # total samples pushed
+        self._next_end = self.frame_length  # end sample (exclusive) of the next frame to analyse
+        self.dropped_hops = 0
+        self.blocks = 0
+        self.compute_seconds = 0.0
+        self.max_block_seconds = 0.0
+        self.estimates.clear()
+
+    def push(self, block):
+        """
+        Feed one block (1-D, or (frames, channels) as delivered by sounddevice; channel 0 is used).
+        :return: list of (time_seconds, f0, voiced) for every hop completed by this block.
+        """
+        start = time.perf_counter()
+        block = np.asarray(block)
+        if block.ndim > 1:
+            block = block[:, 0]
+
+        # Only the newest _capacity samples can ever be analysed
+        n = len(block)
+        if n > self._capacity:
+            block = block[-self._capacity:]
+            self._written += n - self._capacity
+            n = self._capacity
+        pos = self._written % self._capacity
+        first = min(n, self._capacity - pos)
+        self._ring[pos:pos + first] = block[:first]
+        self._ring[:n - first] = block[first:]
+        self._written += n
+
+        # Skip hops whose samples were already overwritten or that exceed the per-block budget
+        oldest_end = self._written - self._capacity + self.frame_length
+        latest_end = self._written
+        if self._next_end < oldest_end:
+            skip = -(-(oldest_end - self._next_end) // self.hop_length)
+            self.dropped_hops += skip
+            self._next_end += skip * self.hop_length
+        pending = 0 if self._next_end > latest_end else (latest_end - self._next_end) // self.hop_length + 1
+        if pending > self.max_hops_per_block:
+            skip = pending - self.max_hops_per_block
+            self.dropped_hops += skip
+            self._next_end += skip * self.hop_length
+            pending = self.max_hops_per_block
+
+        results = []
+        if pending:
+            ends = self._next_end + self.hop_length * np.arange(pending)
+            idx = (ends[:, None] + self._offsets[None, :]) % self._capacity
+            f0, voiced = yin_frames(self._ring[idx], self.sample_rate, self.fmin, self.fmax, self.threshold)
+            # Time stamp each estimate at the centre of its frame
+            times = (ends - self.frame_length / 2) / self.sample_rate
+            results = list(zip(times.tolist(), f0.tolist(), voiced.tolist()))
+            self.estimates.extend(results)
+            self._next_end += pending * self.hop_length
+
+        elapsed = time.perf_counter() - start
+        self.blocks += 1
+        self.compute_seconds += elapsed
+        self.max_block_seconds = max(self.max_block_seconds, elapsed)
+        return results
+
+    @property
+    def algorithmic_latency(self):
+        """Seconds between a sample arriving and the estimate covering it: one frame plus one hop."""
+        return (self.frame_length + self.hop_length) / self.sample_rate
+
+    def latency_report(self, block_size=1024):
+        """Measured per-block compute against the real-time budget of one block."""
+        budget = block_size / self.sample_rate
+        mean = self.compute_seconds / self.blocks if self.blocks else 0.0
+        return {
+            "algorithmic_latency_ms": 1000 * self.algorithmic_latency,
+            "mean_block_ms": 1000 * mean,
+            "max_block_ms": 1000 * self.max_block_seconds,
+            "block_budget_ms": 1000 * budget,
+            "worst_case_load": self.max_block_seconds / budget if budget else 0.0,
+            "dropped_hops": self.dropped_hops,
+        }
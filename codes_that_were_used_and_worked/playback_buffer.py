@@ -0,0 +1,49 @@
+import os
+import numpy as np
+
+
+def prepare_playback_buffer(song_audio, cache_path=None):
+    """
+    Convert a librosa-style (channels, N) array into the C-contiguous interleaved
+    (N, channels) float32 layout sounddevice expects, so every output callback
+    is a single contiguous copy. With cache_path the buffer is written once as raw
+    float32 and returned memory-mapped.
+    """
+    song_audio = np.asarray(song_audio, dtype=np.float32)
+    if song_audio.ndim == 1:
+        song_audio = song_audio[np.newaxis, :]
+    frames = np.ascontiguousarray(song_audio.T)
+
+    if cache_path is None:
+        return frames
+    frames.tofile(cache_path)
+    return load_playback_buffer(cache_path, frames.shape[1])
+
+
+def load_playback_buffer(cache_path, channels):
+    """Memory-map a raw interleaved float32 buffer written by prepare_playback_buffer()."""
+    n_frames = os.path.getsize(cache_path) // (4 * channels)
+    mapped = np.memmap(cache_path, dtype=np.float32, mode="r", shape=(n_frames, channels))
+    # Plain ndarray view: slicing a np.memmap subclass costs extra per callback
+    return mapped.view(np.ndarray)
+
+
+def fill_from(buffer, position, outdata):
+    """
+    Copy the next block of an interleaved (N, channels) buffer into outdata and
+    zero whatever is left past the end. Returns the number of frames copied.
+    """
+    frames = min(len(outdata), len(buffer) - position)
+    outdata[:frames] = buffer[position:position + frames]
+    if frames < len(outdata):
+        outdata[frames:] = 0
+    return frames
+
+
+def fill_from_planar(song_audio, position, outdata):
+    """The original layout: slice a (channels, N) array and transpose it (strided copy)."""
+    frames = min(len(outdata), song_audio.shape[1] - position)
+    outdata[:frames] = song_audio[:, position:position + frames].T
+    if frames < len(outdata):
+        outdata[frames:] = 0
+    return frames
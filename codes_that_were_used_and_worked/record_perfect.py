@@ -1,72 +1,127 @@
-import sounddevice as sd
+import os
+import argparse
 import soundfile as sf
 import numpy as np
-import time
-from queue import Queue
 from threading import Event
-import librosa
+from pitch_tracker import StreamingPitchTracker
+from ring_buffer import SPSCRingBuffer, DiskWriter
+from playback_buffer import fill_from
+from decoded_cache import load_window, DEFAULT_CACHE_DIR
+import alignment
+import pitch_scoring
+from pitch_correction import StreamingPitchCorrector
+import audio_io
 
 class LiveVocalRecorder:
-    def __init__(self, song_path):
+    def __init__(self, song_path, track_pitch=True, on_pitch=None, offset=0.0, cache_dir=DEFAULT_CACHE_DIR,
+                 correct_pitch=False, follow_reference=True, monitor_gain=0.8, audio=None):
+        # Sound card, or an audio_io.VirtualDevice replaying a take as fast as the CPU allows
+        self.audio = audio or audio_io.get_backend()
+
         # Audio configuration
         self.sample_rate = 44100
         self.duration = 20  # seconds
         self.dtype = 'float32'
         
-        # Load and prepare first 20s of song
-        self.song_audio, _ = librosa.load(
+        # 20s window of the song starting at offset, as an interleaved (N, 2) float32 view of
+        # the memory-mapped decode cache: only the first session with a song decodes it
+        self.song_frames = load_window(
             song_path,
+            offset=offset,
+            duration=self.duration,
             sr=self.sample_rate,
-            mono=False,
-            duration=self.duration
+            channels=2,
+            cache_dir=cache_dir
         )
+        self.underruns = 0
         
-        # Convert to stereo if mono
-        if len(self.song_audio.shape) == 1:
-            self.song_audio = np.vstack([self.song_audio, self.song_audio])
-        
-        # Buffers and flags
-        self.recording_buffer = Queue()
+        # Buffers and flags: the callback writes into a preallocated ring that a
+        # background DiskWriter streams to the output file
+        self.ring_seconds = 2
+        self.recording_buffer = SPSCRingBuffer(self.ring_seconds * self.sample_rate, channels=1, dtype=self.dtype)
         self.stop_event = Event()
         
-        # Latency compensation (adjust based on your hardware)
-        self.latency_offset = int(0.2 * self.sample_rate)  # 200ms
+        # Latency compensation: measured per device profile (see calibrate() and align_take()),
+        # falling back to 200ms for a device that was never measured
+        self.device_key = self._device_key()
+        self.latency_offset = alignment.get_offset(self.device_key, self.sample_rate)
+        self.last_alignment = None
+
+        # Live pitch: one (time, f0, voiced) estimate per hop, computed inside the input callback
+        self.pitch_tracker = StreamingPitchTracker(self.sample_rate) if track_pitch else None
+        self.on_pitch = on_pitch
+
+        # Live correction: microphone blocks are corrected in the input callback (toward the
+        # reference vocals' contour, or the nearest note) and handed to the output callback
+        # through a second ring to be mixed into the monitor; the take on disk stays dry
+        self.corrector = None
+        self.monitor_gain = monitor_gain
+        if correct_pitch:
+            reference = pitch_scoring.extract_contour(self.song_frames, self.sample_rate) if follow_reference else None
+            self.corrector = StreamingPitchCorrector(self.sample_rate, reference=reference)
+            self.monitor_buffer = SPSCRingBuffer(self.sample_rate // 2, channels=1, dtype=self.dtype)
+
+    def _device_key(self):
+        """Profile key for the current default input/output device pair."""
+        try:
+            inp = self.audio.query_devices(kind='input')['name']
+            out = self.audio.query_devices(kind='output')['name']
+            return f"{inp} -> {out}"
+        except Exception:
+            return "default"
 
     def _input_callback(self, indata, frames, time, status):
         """Microphone recording callback"""
-        self.recording_buffer.put(indata.copy())
+        self.recording_buffer.write(indata)
+        if self.pitch_tracker is not None:
+            estimates = self.pitch_tracker.push(indata)
+            if self.on_pitch is not None and estimates:
+                self.on_pitch(estimates)
+        if self.corrector is not None:
+            self.monitor_buffer.write(self.corrector.process(indata)[:, None])
 
     def _output_callback(self, outdata, frames, time, status):
         """Song playback callback"""
-        if self.current_position + frames > len(self.song_audio[0]):
-            remaining = len(self.song_audio[0]) - self.current_position
-            outdata[:remaining] = self.song_audio[:, self.current_position:].T
-            outdata[remaining:] = 0
-            raise sd.CallbackStop
-        else:
-            outdata[:] = self.song_audio[:, self.current_position:self.current_position+frames].T
-            self.current_position += frames
+        if status.output_underflow:
+            self.underruns += 1
+        copied = fill_from(self.song_frames, self.current_position, outdata)
+        self.current_position += copied
+        if self.corrector is not None:
+            self._mix_monitor(outdata)
+        if copied < frames:
+            raise self.audio.CallbackStop
+
+    def _mix_monitor(self, outdata):
+        """Add the corrected voice waiting in the monitor ring to both output channels."""
+        row = 0
+        for view in self.monitor_buffer.segments(len(outdata)):
+            outdata[row:row + len(view)] += self.monitor_gain * view
+            row += len(view)
+        self.monitor_buffer.advance(row)
 
     def _play_countdown(self):
         """3-second audio/visual countdown"""
+        import librosa
+
         print("\n🎶 Starting in:")
         for i in range(3, 0, -1):
             print(f"🎤 {i}...")
             beep = librosa.tone(440, sr=self.sample_rate, duration=0.5)
-            sd.play(beep, samplerate=self.sample_rate)
-            time.sleep(1)
+            self.audio.play(beep, samplerate=self.sample_rate)
+            self.audio.sleep(1)
         print("\nSING NOW!\n")
 
-    def record(self, output_path):
+    def _run_session(self, output_path, skip_frames, max_frames):
+        """Play song_frames while streaming the microphone to output_path. Returns frames written."""
         # Initialize streams
-        input_stream = sd.InputStream(
+        input_stream = self.audio.InputStream(
             samplerate=self.sample_rate,
             channels=1,
             callback=self._input_callback,
             blocksize=1024
         )
 
-        output_stream = sd.OutputStream(
+        output_stream = self.audio.OutputStream(
             samplerate=self.sample_rate,
             channels=2,
             callback=self._output_callback,
@@ -75,9 +130,27 @@ class LiveVocalRecorder:
 
         # Reset position tracker
         self.current_position = 0
+        self.underruns = 0
+        self.stop_event.clear()
+        self.recording_buffer.reset()
+        if self.pitch_tracker is not None:
+            self.pitch_tracker.reset()
+        if self.corrector is not None:
+            self.corrector.reset()
+            self.monitor_buffer.reset()
 
-        # Start countdown
-        self._play_countdown()
+        # Stream the take to disk while recording, with latency compensation and
+        # trimming to the exact duration applied on the fly. A virtual device runs the
+        # callbacks on this thread, so its ring is drained here instead of by the writer thread
+        writer = DiskWriter(
+            self.recording_buffer,
+            output_path,
+            self.sample_rate,
+            skip_frames=skip_frames,
+            max_frames=max_frames
+        )
+        if self.audio.realtime:
+            writer.start()
 
         # Start recording and playback
         input_stream.start()
@@ -86,10 +159,12 @@ class LiveVocalRecorder:
         try:
             # Wait for playback to complete
             while not self.stop_event.is_set():
-                time.sleep(0.1)
+                self.audio.sleep(0.1)
+                if not self.audio.realtime:
+                    writer.drain()
             
             # Wait for remaining audio to flush
-            time.sleep(0.5)
+            self.audio.sleep(0.5)
 
         finally:
             # Stop streams
@@ -98,37 +173,122 @@ class LiveVocalRecorder:
             input_stream.close()
             output_stream.close()
 
-            # Process recording
-            recorded_chunks = []
-            while not self.recording_buffer.empty():
-                recorded_chunks.append(self.recording_buffer.get())
-            
-            if recorded_chunks:
-                raw_vocals = np.concatenate(recorded_chunks)
-                
-                # Apply latency compensation
-                if len(raw_vocals) > self.latency_offset:
-                    raw_vocals = raw_vocals[self.latency_offset:]
-                
-                # Trim to exact duration
-                max_samples = self.duration * self.sample_rate
-                raw_vocals = raw_vocals[:max_samples]
-                
-                # Save files
-                sf.write(output_path, raw_vocals, self.sample_rate)
-                sf.write("reference_track_20s.wav", self.song_audio.T, self.sample_rate)
-                
-                print(f"\n✅ 20s recording saved to {output_path}")
-                print("✅ 20s reference track saved to reference_track_20s.wav")
-            else:
+            # Flush the remaining frames and close the file
+            frames_written = writer.close()
+
+        return frames_written
+
+    def calibrate(self, calibration_path="latency_calibration.wav"):
+        """
+        Play a chirp through the output callback, record it back and store the measured
+        round-trip latency in this device's profile.
+        """
+        song_frames = self.song_frames
+        chirp = alignment.make_chirp(self.sample_rate)
+        self.song_frames = np.ascontiguousarray(np.column_stack([chirp, chirp]))
+        try:
+            print("\n📢 Calibrating latency, keep the microphone near the speakers...")
+            if not self._run_session(calibration_path, skip_frames=0, max_frames=None):
                 print("\n❌ No audio was recorded - check your microphone!")
+                return None
+            recorded, _ = sf.read(calibration_path, dtype='float32')
+        finally:
+            self.song_frames = song_frames
 
-if __name__ == "__main__":
+        lag, confidence = alignment.estimate_offset(recorded, chirp, self.sample_rate, max_lag_seconds=1.0)
+        if confidence < alignment.MIN_CALIBRATION_CONFIDENCE:
+            print(f"\n⚠️ Calibration too unreliable (confidence {confidence:.2f}), keeping "
+                  f"{1000 * self.latency_offset / self.sample_rate:.1f} ms - try again with the volume up")
+            return None
+        self.latency_offset = max(lag, 0)
+        alignment.save_offset(self.device_key, self.latency_offset, self.sample_rate, confidence, "chirp")
+        print(f"✅ Measured latency {1000 * lag / self.sample_rate:.1f} ms (confidence {confidence:.2f})")
+        return lag
+
+    def align_take(self, output_path, max_lag_seconds=0.5, min_confidence=0.1):
+        """
+        Cross-correlate the saved take against the reference and report any residual offset
+        left after latency compensation. A confident non-zero lag is fixed in an aligned copy
+        next to the take; neither the take nor the device profile is changed.
+        :return: path of the aligned copy, or None if none was needed
+        """
+        take, _ = sf.read(output_path, dtype='float32')
+        reference = self.song_frames[:len(take)]
+        lag, confidence = alignment.estimate_offset(take, reference, self.sample_rate, max_lag_seconds)
+        self.last_alignment = {"lag_samples": lag, "confidence": confidence, "aligned_path": None}
+
+        if confidence < min_confidence or lag == 0:
+            return None
+        root, ext = os.path.splitext(output_path)
+        aligned_path = f"{root}_aligned{ext}"
+        sf.write(aligned_path, alignment.shift_take(take, lag), self.sample_rate)
+        self.last_alignment["aligned_path"] = aligned_path
+        print(f"🔧 Residual offset {1000 * lag / self.sample_rate:.1f} ms (confidence {confidence:.2f}), "
+              f"aligned copy saved to {aligned_path}")
+        return aligned_path
+
+    def score_take(self, output_path):
+        """Pitch/timing score of the saved take against the reference window that was played."""
+        return pitch_scoring.score_take(output_path, self.song_frames, sr=self.sample_rate)
+
+    def record(self, output_path, align=True, score=True):
+        # Start countdown
+        self._play_countdown()
+
+        frames_written = self._run_session(
+            output_path,
+            skip_frames=self.latency_offset,
+            max_frames=self.duration * self.sample_rate
+        )
+
+        if frames_written:
+            aligned_path = self.align_take(output_path) if align else None
+            sf.write("reference_track_20s.wav", self.song_frames, self.sample_rate)
+            
+            print(f"\n✅ 20s recording saved to {output_path}")
+            print("✅ 20s reference track saved to reference_track_20s.wav")
+            if self.underruns:
+                print(f"⚠️ {self.underruns} playback underrun(s)")
+            if self.recording_buffer.dropped_frames:
+                print(f"⚠️ {self.recording_buffer.dropped_frames} frames dropped (disk writer fell behind)")
+
+            if self.pitch_tracker is not None:
+                report = self.pitch_tracker.latency_report(block_size=1024)
+                print(f"🎵 Live pitch: {len(self.pitch_tracker.estimates)} estimates, "
+                      f"{report['algorithmic_latency_ms']:.1f} ms algorithmic latency, "
+                      f"worst block {report['max_block_ms']:.2f} ms of {report['block_budget_ms']:.2f} ms budget")
+
+            if self.corrector is not None:
+                report = self.corrector.latency_report(block_size=1024)
+                print(f"🎛️ Pitch correction: {report['algorithmic_latency_ms']:.1f} ms algorithmic latency, "
+                      f"worst block {report['max_block_ms']:.2f} ms of {report['block_budget_ms']:.2f} ms budget, "
+                      f"mean correction {report['mean_abs_correction_cents']:.1f} cents")
+
+            if score:
+                pitch_scoring.print_report(self.score_take(aligned_path or output_path))
+        else:
+            print("\n❌ No audio was recorded - check your microphone!")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sing along to a song while the take is recorded.")
     # ======================================
-    # EDIT THESE FILENAMES BEFORE RUNNING
-    input_song = "vocals.wav"  # Your input song file
-    output_vocals = "kebrit.wav"  # Where to save your vocals
+    # DEFAULT FILENAMES
+    parser.add_argument("song", nargs="?", default="vocals.wav", help="Song to sing along to")
+    parser.add_argument("output", nargs="?", default="kebrit.wav", help="Where to save your vocals")
     # ======================================
-    
-    recorder = LiveVocalRecorder(input_song)
-    recorder.record(output_vocals)
\ No newline at end of file
+    parser.add_argument("--offset", type=float, default=0.0, help="Start this many seconds into the song")
+    parser.add_argument("--correct-pitch", action="store_true", help="Monitor through the live pitch corrector")
+    parser.add_argument("--calibrate", action="store_true", help="Measure this device's latency first")
+    parser.add_argument("--no-align", action="store_true")
+    parser.add_argument("--no-score", action="store_true")
+    parser.add_argument("--replay", help="Use this recorded take as the microphone, without a sound card")
+    args = parser.parse_args(argv)
+
+    audio = audio_io.VirtualDevice(args.replay) if args.replay else None
+    recorder = LiveVocalRecorder(args.song, offset=args.offset, correct_pitch=args.correct_pitch, audio=audio)
+    if args.calibrate:
+        recorder.calibrate()
+    recorder.record(args.output, align=not args.no_align, score=not args.no_score)
+
+if __name__ == "__main__":
+    main()
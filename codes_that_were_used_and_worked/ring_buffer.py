@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+import numpy as np
+import soundfile as sf
+
+
+class SPSCRingBuffer:
+    """
+    Preallocated single-producer/single-consumer ring buffer of audio frames.
+    The producer (the audio callback) only moves the write counter and the consumer
+    only moves the read counter, so neither side takes a lock. A counter is published
+    after the frames are copied, so the other side never sees half-written data.
+    """
+
+    def __init__(self, capacity, channels=1, dtype="float32"):
+        self.capacity = int(capacity)
+        self.channels = channels
+        self._data = np.zeros((self.capacity, channels), dtype=dtype)
+        self._written = 0  # total frames written, owned by the producer
+        self._read = 0  # total frames consumed, owned by the consumer
+        self.dropped_frames = 0
+
+    def available(self):
+        """Frames ready to be read."""
+        return self._written - self._read
+
+    def free(self):
+        return self.capacity - (self._written - self._read)
+
+    def write(self, block):
+        """Producer side: copy a (frames, channels) block in. Frames that do not fit are dropped."""
+        n = len(block)
+        free = self.free()
+        if n > free:
+            self.dropped_frames += n - free
+            n = free
+        pos = self._written % self.capacity
+        first = min(n, self.capacity - pos)
+        self._data[pos:pos + first] = block[:first]
+        self._data[:n - first] = block[first:n]
+        self._written += n
+        return n
+
+    def segments(self, max_frames=None):
+        """Consumer side: up to two contiguous views covering the readable frames (no copy)."""
+        n = self.available()
+        if max_frames is not None:
+            n = min(n, max_frames)
+        pos = self._read % self.capacity
+        first = min(n, self.capacity - pos)
+        views = [self._data[pos:pos + first]]
+        if n > first:
+            views.append(self._data[:n - first])
+        return views
+
+    def advance(self, frames):
+        """Consumer side: release frames returned by segments()."""
+        self._read += frames
+
+    def read(self, max_frames=None):
+        """Consumer side: copy out and release up to max_frames frames."""
+        views = self.segments(max_frames)
+        out = np.concatenate(views) if len(views) > 1 else views[0].copy()
+        self.advance(len(out))
+        return out
+
+    def reset(self):
+        self._written = 0
+        self._read = 0
+        self.dropped_frames = 0
+
+
+class DiskWriter(threading.Thread):
+    """
+    Background thread that streams frames from an SPSCRingBuffer straight into an
+    open soundfile.SoundFile, so memory stays constant however long the take is.
+    The first skip_frames frames are discarded (latency compensation) and at most
+    max_frames frames are written. A take no longer than skip_frames is kept whole,
+    and a take with no frames at all leaves no file behind.
+    """
+
+    def __init__(self, ring, path, samplerate, skip_frames=0, max_frames=None, subtype=None, poll_interval=0.01):
+        super().__init__(daemon=True)
+        self.ring = ring
+        self.path = path
+        self.skip_frames = skip_frames
+        self.max_frames = max_frames
+        self.poll_interval = poll_interval
+        self.frames_written = 0
+        self.frames_seen = 0
+        self._stop_event = threading.Event()
+        # The skipped frames are held back until the take turns out to be longer than them
+        self._held = np.zeros((skip_frames, ring.channels), dtype=ring._data.dtype)
+        self._file = sf.SoundFile(path, mode="w", samplerate=samplerate, channels=ring.channels, subtype=subtype)
+
+    def drain(self):
+        """Write everything currently in the ring buffer. Returns the number of frames consumed."""
+        consumed = 0
+        for view in self.ring.segments():
+            n = len(view)
+            start = min(n, max(0, self.skip_frames - self.frames_seen))
+            self._held[self.frames_seen:self.frames_seen + start] = view[:start]
+            if self.max_frames is not None:
+                stop = max(start, min(n, start + self.max_frames - self.frames_written))
+            else:
+                stop = n
+            if stop > start:
+                self._file.write(view[start:stop])
+                self.frames_written += stop - start
+            self.frames_seen += n
+            consumed += n
+        self.ring.advance(consumed)
+        return consumed
+
+    def run(self):
+        while not self._stop_event.is_set():
+            if not self.drain():
+                time.sleep(self.poll_interval)
+        self.drain()
+
+    def close(self):
+        """Stop the thread (if running), flush what is left and close the file."""
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+        else:
+            self.drain()
+        if not self.frames_written and self.frames_seen:
+            # Shorter than the latency offset: keep the take uncompensated
+            held = self._held[:self.frames_seen]
+            if self.max_frames is not None:
+                held = held[:self.max_frames]
+            self._file.write(held)
+            self.frames_written = len(held)
+        self._file.close()
+        if not self.frames_written:
+            os.remove(self.path)
+        return self.frames_written
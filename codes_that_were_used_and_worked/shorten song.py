@@ -1,12 +1,21 @@
-import librosa
+import argparse
 import soundfile as sf
 
 def shorten_song(file_path, duration=20):
+    import librosa
+
     # Load the first 20 seconds of the audio file
     audio, sr = librosa.load(file_path, sr=None, duration=duration)
     
     # Overwrite the original file with shortened version
     sf.write(file_path, audio, sr, subtype='PCM_16')  # Change subtype if needed
 
-# Example usage:
-shorten_song("vocals.wav")  # Replace with your file path
\ No newline at end of file
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cut a song down to its first seconds, in place.")
+    parser.add_argument("file", nargs="?", default="vocals.wav", help="Replace with your file path")
+    parser.add_argument("--duration", type=float, default=20)
+    args = parser.parse_args(argv)
+    shorten_song(args.file, args.duration)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
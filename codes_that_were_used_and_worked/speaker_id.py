@@ -0,0 +1,132 @@
+import os
+import sys
+from collections import namedtuple
+import numpy as np
+from embedding_store import EmbeddingStore, INDEX_FILE, speaker_id_from_path
+
+# Thresholds (same as checking_if_2_voices_are_the_same.py)
+same_speaker_threshold = 0.85  # High confidence threshold
+uncertain_threshold = 0.75  # Gray area
+distance_threshold = 0.7  # Lower = more similar
+uncertain_distance_threshold = 1.0
+
+SAME = "same"
+UNCERTAIN = "uncertain"
+DIFFERENT = "different"
+
+Match = namedtuple("Match", ["speaker", "similarity", "distance", "decision"])
+
+
+def normalize(embeddings):
+    """L2-normalize one embedding or a (n, dim) stack of embeddings as float32."""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return embeddings / norms
+
+
+def decide(similarity, distance):
+    """Two-tier decision: high confidence match, possible match or different speakers."""
+    if similarity >= same_speaker_threshold and distance < distance_threshold:
+        return SAME
+    if similarity >= uncertain_threshold and distance < uncertain_distance_threshold:
+        return UNCERTAIN
+    return DIFFERENT
+
+
+class SpeakerIndex:
+    """All enrolled embeddings in one pre-normalized float32 matrix for 1:N identification."""
+
+    def __init__(self, speakers, embeddings):
+        self.speakers = list(speakers)
+        self.matrix = np.ascontiguousarray(normalize(embeddings))
+        if self.matrix.ndim != 2 or len(self.speakers) != len(self.matrix):
+            raise ValueError("Need one embedding row per speaker.")
+
+    @classmethod
+    def from_files(cls, paths):
+        """Build the index from loose .npy files, using the file name as speaker id."""
+        speakers = [speaker_id_from_path(p) for p in paths]
+        return cls(speakers, np.stack([np.load(p) for p in paths]))
+
+    @classmethod
+    def from_directory(cls, directory):
+        """Build the index from every .npy file in a directory."""
+        paths = sorted(os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(".npy"))
+        return cls.from_files(paths)
+
+    @classmethod
+    def from_store(cls, store):
+        """Build the index from the live rows of an EmbeddingStore (one mmap, no per-speaker files)."""
+        speakers, matrix = store.live()
+        return cls(speakers, matrix)
+
+    def __len__(self):
+        return len(self.speakers)
+
+    def scores(self, queries):
+        """Cosine similarity of each query against every enrolled speaker, shape (n_queries, n_speakers)."""
+        queries = normalize(np.atleast_2d(queries))
+        return queries @ self.matrix.T
+
+    def identify(self, queries, top_k=5):
+        """
+        Score one query (dim,) or a batch (n, dim) with a single matrix multiply.
+        Returns a list of Match lists (best first), one per query.
+        """
+        sims = self.scores(queries)
+        k = min(top_k, len(self))
+        if k == 0:
+            return [[] for _ in range(len(sims))]
+
+        # Partial sort: only the k best columns per row get fully sorted
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        top_sims = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_sims, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        top_sims = np.take_along_axis(top_sims, order, axis=1)
+
+        # For unit vectors ||a - b|| = sqrt(2 - 2 cos)
+        top_dists = np.sqrt(np.maximum(2.0 - 2.0 * top_sims, 0.0))
+
+        results = []
+        for row, row_sims, row_dists in zip(top, top_sims, top_dists):
+            results.append([
+                Match(self.speakers[i], float(s), float(d), decide(s, d))
+                for i, s, d in zip(row, row_sims, row_dists)
+            ])
+        return results
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) < 2:
+        print("Usage: python speaker_id.py <query.npy|speaker_id> <store_dir|npy_dir|other.npy> [top_k]")
+        return
+
+    query_arg, enrolled = argv[0], argv[1]
+    if os.path.exists(os.path.join(enrolled, INDEX_FILE)):
+        store = EmbeddingStore(enrolled)
+        index = SpeakerIndex.from_store(store)
+        query = np.load(query_arg) if query_arg.endswith(".npy") else store.get(query_arg)
+    elif enrolled.endswith(".npy"):
+        # One-to-one check of two embedding files (what checking_if_2_voices_are_the_same.py does)
+        index = SpeakerIndex.from_files([enrolled])
+        query = np.load(query_arg)
+    else:
+        index = SpeakerIndex.from_directory(enrolled)
+        query = np.load(query_arg)
+    top_k = int(argv[2]) if len(argv) > 2 else 5
+
+    labels = {
+        SAME: "✅ Same speaker detected with high confidence!",
+        UNCERTAIN: "⚠️ Possible same speaker, but needs further verification.",
+        DIFFERENT: "❌ Different speakers.",
+    }
+    print(f"🔍 Comparing against {len(index)} enrolled speaker(s)")
+    for match in index.identify(query, top_k=top_k)[0]:
+        print(f"{match.speaker}: similarity {match.similarity:.4f}, distance {match.distance:.4f} -> {labels[match.decision]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+import os
+import sys
+import importlib
+import importlib.util
+
+# Single entry point: python vocal_cli.py <command> [args...]
+# Nothing heavy is imported here. Each command's module (and with it librosa, spleeter,
+# resemblyzer/torch, ...) is only imported once that command runs, and every module
+# keeps its own optional dependencies inside the functions that use them.
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# command: (module, help); every module has a main(argv=None)
+COMMANDS = {
+    "record": ("record_perfect", "Sing along to a song and save the take"),
+    "enroll": ("voice_embedding_2", "Record the solfège notes and a sentence, then build the voice embedding"),
+    "analyze": ("batch_analysis", "Pitch/note analysis of a recordings folder or archive"),
+    "compare": ("speaker_id", "Compare a voice embedding with another one or with the enrolled speakers"),
+    "download": ("download_and_process", "Download songs from urls.txt and extract their vocals"),
+    "separate": ("vocal_separation", "Extract the vocals stem of a local file"),
+    "shorten": ("shorten song", "Cut a song down to its first seconds, in place"),
+    "score": ("pitch_scoring", "Score a take against the reference vocals"),
+    "correct": ("pitch_correction", "Pitch-correct a recorded take"),
+    "daemon": ("analysis_daemon", "Warm analysis daemon and its client (serve / call)"),
+    "ingest": ("ingest_service", "Continuously ingest song URLs and uploaded files"),
+}
+
+IMPORT_BUDGET_SECONDS = {"compare": 0.5}  # commands that must start quickly
+REPORT_TOP = 8  # packages listed per command in the import report
+
+
+def load_command(name):
+    """Import the module behind a command."""
+    module_name = COMMANDS[name][0]
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)  # the modules import each other by plain name
+    if " " not in module_name:
+        return importlib.import_module(module_name)
+    # "shorten song.py" is not a valid module name
+    spec = importlib.util.spec_from_file_location(module_name.replace(" ", "_"), os.path.join(HERE, module_name + ".py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# ---------------------
+# IMPORT-TIME REPORT
+# ---------------------
+def parse_importtime(stderr):
+    """
+    Lines of `python -X importtime` output as (module, self_us, cumulative_us).
+    Format: "import time: <self us> | <cumulative us> | <indent><module>".
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the header line
+        rows.append((fields[2].strip(), int(fields[0]), int(fields[1])))
+    return rows
+
+
+def import_profile(name):
+    """
+    Import a command's module in a fresh interpreter under -X importtime.
+    :return: dict with the total import seconds, the process wall time and the
+             per-package self time (submodules summed into their top-level package).
+    """
+    import subprocess
+    import tempfile
+    import time
+
+    code = f"import vocal_cli; vocal_cli.load_command({name!r})"
+    # Some modules create their data folders on import: run in a scratch dir so they land there
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [HERE, os.environ.get("PYTHONPATH")])))
+    with tempfile.TemporaryDirectory() as scratch:
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=scratch, env=env,
+                                capture_output=True, text=True)
+        wall = time.perf_counter() - start
+
+    packages = {}
+    total = 0
+    for module, self_us, _ in parse_importtime(result.stderr):
+        total += self_us
+        package = module.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+    return {
+        "ok": result.returncode == 0,
+        "error": result.stderr.strip().splitlines()[-1] if result.returncode else None,
+        "import_seconds": total / 1e6,
+        "wall_seconds": wall,
+        "packages": sorted(((p, us / 1e6) for p, us in packages.items()), key=lambda item: -item[1]),
+    }
+
+
+def import_report(names=None):
+    """Print how long each command takes to import, slowest packages first. Returns False if a budget is exceeded."""
+    within_budget = True
+    for name in names or COMMANDS:
+        profile = import_profile(name)
+        budget = IMPORT_BUDGET_SECONDS.get(name)
+        status = ""
+        if not profile["ok"]:
+            status = f"❌ {profile['error']}"
+        elif budget is not None:
+            within_budget &= profile["import_seconds"] <= budget
+            status = "✅" if profile["import_seconds"] <= budget else f"❌ over the {budget:.2f} s budget"
+        print(f"\n{name:<10} imports {profile['import_seconds']:.3f} s "
+              f"(process {profile['wall_seconds']:.3f} s) {status}")
+        for package, seconds in profile["packages"][:REPORT_TOP]:
+            print(f"    {package:<24} {seconds * 1000:>8.1f} ms")
+    return within_budget
+
+
+# ---------------------
+# CLI
+# ---------------------
+def print_usage():
+    print("Usage: python vocal_cli.py <command> [args...]")
+    print("       python vocal_cli.py --import-report [command ...]\n")
+    print("Commands:")
+    for name, (_, help_text) in COMMANDS.items():
+        print(f"  {name:<10} {help_text}")
+    print("\nRun `python vocal_cli.py <command> --help` for a command's options.")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print_usage()
+        return 0
+    if argv[0] == "--import-report":
+        unknown = [name for name in argv[1:] if name not in COMMANDS]
+        if unknown:
+            print(f"Unknown command(s): {', '.join(unknown)}")
+            return 2
+        return 0 if import_report(argv[1:]) else 1
+    if argv[0] not in COMMANDS:
+        print(f"Unknown command: {argv[0]}\n")
+        print_usage()
+        return 2
+
+    load_command(argv[0]).main(argv[1:])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
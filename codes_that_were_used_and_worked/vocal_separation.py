@@ -0,0 +1,137 @@
+import argparse
+import numpy as np
+import soundfile as sf
+
+SPLEETER_SR = 44100  # Spleeter models work at 44.1 kHz
+WINDOW_SECONDS = 30
+OVERLAP_SECONDS = 2
+
+
+def get_separator():
+    """Separator for the streaming path (multiprocess=False: no extra writer pool)."""
+    from spleeter.separator import Separator
+    return Separator('spleeter:2stems', multiprocess=False)
+
+
+def _to_spleeter_rate(window, sr):
+    if sr == SPLEETER_SR:
+        return window
+    from scipy.signal import resample_poly
+
+    g = np.gcd(SPLEETER_SR, sr)
+    return resample_poly(window, SPLEETER_SR // g, sr // g, axis=0).astype(np.float32)
+
+
+def load_for_separation(path):
+    """Decode any format ffmpeg understands to (frames, channels) float32 at 44.1 kHz."""
+    from spleeter.audio.adapter import AudioAdapter
+    waveform, _ = AudioAdapter.default().load(path, sample_rate=SPLEETER_SR)
+    return waveform.astype(np.float32)
+
+
+def separate_vocals(source, separator=None, sr=None, mono=False, input_sr=SPLEETER_SR):
+    """
+    Vocals stem as a float32 array, without writing anything to disk.
+    The accompaniment is never written, and the result can go straight to
+    pitch extraction or embedding (e.g. sr=16000, mono=True for resemblyzer).
+    :param source: file path, or a (frames, channels) waveform sampled at input_sr.
+    :param sr: output sample rate, 44100 (Spleeter's rate) when None.
+    :param mono: average the two channels.
+    :return: (frames, 2) array, or (frames,) when mono.
+    """
+    separator = separator or get_separator()
+    if isinstance(source, str):
+        waveform, input_sr = load_for_separation(source), SPLEETER_SR
+    else:
+        waveform = np.asarray(source, dtype=np.float32)
+        if waveform.ndim == 1:
+            waveform = waveform[:, None]
+
+    vocals = separate_window(separator, waveform, input_sr)
+    if mono:
+        vocals = vocals.mean(axis=1)
+    if sr is not None and sr != SPLEETER_SR:
+        from scipy.signal import resample_poly
+
+        g = np.gcd(SPLEETER_SR, sr)
+        vocals = resample_poly(vocals, sr // g, SPLEETER_SR // g, axis=0)
+    return np.ascontiguousarray(vocals, dtype=np.float32)
+
+
+def separate_window(separator, window, sr=SPLEETER_SR):
+    """Vocals stem of one (frames, channels) window, as (frames, 2) float32 at 44.1 kHz."""
+    prediction = separator.separate(_to_spleeter_rate(window, sr))
+    return prediction["vocals"].astype(np.float32)
+
+
+def separate_streaming(input_path, output_path, separator=None, window_seconds=WINDOW_SECONDS,
+                       overlap_seconds=OVERLAP_SECONDS, subtype="PCM_16"):
+    """
+    Separate a long file window by window so memory depends on the window size, not
+    on the track length. Consecutive windows overlap by overlap_seconds; the vocal
+    stems are linearly cross-faded over the overlap and written out as soon as they
+    are final. Only the vocals stem is written.
+    :return: number of frames written.
+    """
+    separator = separator or get_separator()
+    written = 0
+
+    with sf.SoundFile(input_path) as src, \
+            sf.SoundFile(output_path, "w", samplerate=SPLEETER_SR, channels=2, subtype=subtype) as dst:
+        sr = src.samplerate
+        window_frames = int(window_seconds * sr)
+        overlap_frames = int(overlap_seconds * sr)
+        if overlap_frames >= window_frames:
+            raise ValueError("overlap_seconds must be shorter than window_seconds")
+
+        carry = np.empty((0, src.channels), dtype=np.float32)  # input overlap for the next window
+        tail = None  # separated overlap of the previous window, waiting for its cross-fade
+
+        while True:
+            wanted = window_frames - len(carry)
+            block = src.read(wanted, dtype="float32", always_2d=True)
+            if len(block) == 0:
+                break
+            at_end = len(block) < wanted
+            window = np.concatenate([carry, block]) if len(carry) else block
+            vocals = separate_window(separator, window, sr)
+
+            if tail is not None:
+                n = min(len(tail), len(vocals))
+                fade_in = np.linspace(0.0, 1.0, n, dtype=np.float32)[:, None]
+                vocals[:n] = tail[:n] * (1.0 - fade_in) + vocals[:n] * fade_in
+                tail = None
+
+            if at_end:
+                dst.write(vocals)
+                written += len(vocals)
+                break
+
+            overlap_out = int(round(overlap_frames * SPLEETER_SR / sr))
+            dst.write(vocals[:len(vocals) - overlap_out])
+            written += len(vocals) - overlap_out
+            tail = vocals[len(vocals) - overlap_out:].copy()
+            carry = window[len(window) - overlap_frames:].copy()
+
+        # The file ended exactly on a window boundary: the held overlap is final as is
+        if tail is not None:
+            dst.write(tail)
+            written += len(tail)
+
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract the vocals stem of a local file with Spleeter.")
+    parser.add_argument("input", help="Song (WAV/FLAC/...)")
+    parser.add_argument("output", help="Vocals WAV to write")
+    parser.add_argument("--window", type=float, default=WINDOW_SECONDS, help="Seconds separated at a time")
+    parser.add_argument("--overlap", type=float, default=OVERLAP_SECONDS, help="Cross-fade between windows, in seconds")
+    args = parser.parse_args(argv)
+
+    frames = separate_streaming(args.input, args.output, window_seconds=args.window, overlap_seconds=args.overlap)
+    print(f"🎙️ Extracted {frames / SPLEETER_SR:.1f} s of vocals to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
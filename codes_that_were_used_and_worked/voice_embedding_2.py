@@ -1,11 +1,17 @@
 import os
+import argparse
 os.environ['KMP_DUPLICATE_LIB_OK'] = 'TRUE'
-import sounddevice as sd
 import soundfile as sf
-from pydub import AudioSegment
-from resemblyzer import VoiceEncoder
-import numpy as np
-import librosa
+from embedding_store import EmbeddingStore
+from encoder_cache import get_encoder
+from batch_analysis import analyze_files, solfege_notes
+from pitch_engine import get_engine
+import audio_loader
+import instrumentation
+from instrumentation import span
+from note_mapping import nearest_note
+from enrollment_audio import enrollment_layout, combine, to_float
+import audio_io
 
 # Define paths and configurations
 CURRENT_DIR = os.getcwd()
@@ -14,132 +20,144 @@ os.makedirs(RECORDINGS_DIR, exist_ok=True)
 
 SENTENCE = "Watan al nujoum... ana huna, haddi2... atzakar men ana? Alama7ta fi el madi el ba3id, fatan ghriran ar3ana?"
 
-solfege_notes = {
-    'Do': 261.63,  # C4
-    'Re': 293.66,  # D4
-    'Mi': 329.63,  # E4
-    'Fa': 349.23,  # F4
-    'Sol': 392.00, # G4
-    'La': 440.00,  # A4
-    'Si': 493.88   # B4
-}
-
 recording_files = {note: os.path.join(RECORDINGS_DIR, f"user_{note}.wav") for note in solfege_notes}
 combined_audio_file = os.path.join(RECORDINGS_DIR, "ML.wav")
-embedding_file = os.path.join(RECORDINGS_DIR, "ML.npy")
+EMBEDDING_STORE_DIR = os.path.join(RECORDINGS_DIR, "embeddings")
+SPEAKER_ID = "ML"
 
-def record_note(note, filename, duration=3, samplerate=44100):
-    """Record a single solfège note and save it to a file."""
+def record_note(note, filename, duration=3, samplerate=44100, audio=None):
+    """Record a single solfège note and save it to a file (from `audio`, the sound card by default)."""
+    audio = audio or audio_io.get_backend()
     print(f"Recording {note}... Please sing now!")
-    audio_data = sd.rec(int(duration * samplerate), samplerate=samplerate, channels=1, dtype='int16')
-    sd.wait()
-    sf.write(filename, audio_data, samplerate)
+    with span("record", note=note, audio_seconds=duration) as s:
+        audio_data = audio.rec(int(duration * samplerate), samplerate=samplerate, channels=1, dtype='int16')
+        audio.wait()
+        sf.write(filename, audio_data, samplerate)
+        s.add(bytes_written=os.path.getsize(filename))
     print(f"Saved: {filename}")
 
-def record_all_notes():
+def record_all_notes(audio=None):
     """Record all solfège notes (Do, Re, Mi, Fa, Sol, La, Si)."""
     for note, filename in recording_files.items():
-        record_note(note, filename)
+        record_note(note, filename, audio=audio)
 
-def record_sentence(filename, duration=10, samplerate=44100):
+def record_sentence(filename, duration=10, samplerate=44100, audio=None):
     """Record the spoken sentence"""
+    audio = audio or audio_io.get_backend()
     print("\nNow please read this sentence:")
     print(SENTENCE)
     print("Recording starts now...")
-    audio_data = sd.rec(int(duration * samplerate), samplerate=samplerate, channels=1, dtype='int16')
-    sd.wait()
-    sf.write(filename, audio_data, samplerate)
+    with span("record", note="sentence", audio_seconds=duration) as s:
+        audio_data = audio.rec(int(duration * samplerate), samplerate=samplerate, channels=1, dtype='int16')
+        audio.wait()
+        sf.write(filename, audio_data, samplerate)
+        s.add(bytes_written=os.path.getsize(filename))
     print(f"Saved sentence recording to: {filename}")
 
-def combine_audio():
-    """Combine notes and sentence into one audio file"""
-    combined = AudioSegment.silent(duration=500)
-    
-    # Add musical notes
-    for note in solfege_notes:
-        filepath = recording_files[note]
-        if os.path.exists(filepath):
-            sound = AudioSegment.from_wav(filepath)
-            combined += sound + AudioSegment.silent(duration=300)
-    
-    # Add sentence recording
+@instrumentation.traced("combine_audio")
+def combine_audio(write=True):
+    """
+    Combine notes and sentence into one audio file (see enrollment_audio.py).
+    :return: (pcm, sr) of the combined audio, so it can be embedded without reading the file back.
+    """
     sentence_path = os.path.join(RECORDINGS_DIR, "sentence.wav")
-    if os.path.exists(sentence_path):
-        combined += AudioSegment.silent(duration=1000)  # 1 second pause
-        combined += AudioSegment.from_wav(sentence_path)
-    
-    combined.export(combined_audio_file, format="wav")
-    print(f"Combined audio saved as {combined_audio_file}")
+    layout = enrollment_layout([recording_files[note] for note in solfege_notes], sentence_path)
+    combined = combine(layout, combined_audio_file if write else None)
+    if write:
+        print(f"Combined audio saved as {combined_audio_file}")
+    return combined
 
-def detect_pitch(filename):
+def detect_pitch(filename, engine="pyin"):
     """
-    Detect the average pitch of an audio file using librosa.pyin.
+    Detect the average pitch of an audio file (librosa.pyin by default, see pitch_engine.py).
     Adjust fmin and fmax to [C3, C6] (approx. 130Hz to 1046Hz) to reduce octave errors.
+    The pitch is returned in the octave it was sung in: the solfège mapping is octave-independent.
     """
-    y, sr = librosa.load(filename, sr=44100)
-    fmin = librosa.note_to_hz('C3')
-    fmax = librosa.note_to_hz('C6')
-    f0, voiced_flag, voiced_probs = librosa.pyin(y, fmin=fmin, fmax=fmax, sr=sr, pad_mode='constant')
-    
-    valid_f0 = f0[~np.isnan(f0)]
-    if len(valid_f0) == 0:
+    y, sr = audio_loader.load(filename, sr=44100)
+    with span(f"pitch.{engine}", audio_seconds=len(y) / sr):
+        avg_pitch = get_engine(engine).median_pitch(y, sr)
+    if avg_pitch is None:
         print(f"No pitch detected in {filename}.")
         return None
-    avg_pitch = np.median(valid_f0)
-    
-    if avg_pitch < 150:
-        avg_pitch *= 2
     return avg_pitch
 
 def map_pitch_to_note(pitch):
-    """Map a detected pitch to the closest solfège note based on standard frequencies."""
-    if pitch is None:
-        return None
-    return min(solfege_notes, key=lambda note: abs(solfege_notes[note] - pitch))
+    """Map a detected pitch to the closest note of the equal-tempered scale, as a solfège syllable."""
+    return nearest_note(pitch)
 
-def analyze_recordings():
+@instrumentation.traced("analyze_recordings")
+def analyze_recordings(workers=None, engine="pyin"):
     """Analyze each individual recording: detect its pitch and map it to a solfège syllable."""
     print("Analyzing recorded notes...")
+    jobs = []
     for note, filename in recording_files.items():
         if os.path.exists(filename):
-            pitch = detect_pitch(filename)
-            mapped_note = map_pitch_to_note(pitch)
-            if pitch is not None:
-                print(f"{note}: Detected pitch = {pitch:.2f} Hz, Mapped to: {mapped_note}")
-            else:
-                print(f"{note}: No pitch detected.")
+            jobs.append((filename, note))
         else:
             print(f"File {filename} not found!")
 
-def generate_embedding():
-    if not os.path.exists(combined_audio_file):
+    # pyin is the slow step: run the notes in parallel, one process per core
+    results = analyze_files(jobs, workers=workers, engine=engine)
+    for result in results:
+        note = result["note"]
+        if result.get("error"):
+            print(f"{note}: Analysis failed: {result['error']}")
+        elif result["f0_median"] is not None:
+            print(f"{note}: Detected pitch = {result['f0_median']:.2f} Hz, Mapped to: {result['syllable']}")
+        else:
+            print(f"{note}: No pitch detected.")
+    return results
+
+def generate_embedding(speaker_id=SPEAKER_ID, combined=None):
+    """
+    Embed the combined enrollment audio and store it under speaker_id.
+    :param combined: (pcm, sr) returned by combine_audio(); ML.wav is read when not given.
+    """
+    if combined is None and not os.path.exists(combined_audio_file):
         print(f"Error: {combined_audio_file} not found!")
         return
     print("Generating voice embedding...")
-    wav, sr = librosa.load(combined_audio_file, sr=16000)
-    encoder = VoiceEncoder()
-    embedding = encoder.embed_utterance(wav)
-    np.save(embedding_file, embedding)
-    print(f"Voice embedding saved as {embedding_file}")
+    if combined is None:
+        wav, sr = audio_loader.load(combined_audio_file, sr=16000)
+    else:
+        wav, sr = to_float(*combined, target_sr=16000)
+    with span("resemblyzer.load"):
+        encoder = get_encoder()  # loaded once per process
+    with span("resemblyzer.embed", audio_seconds=len(wav) / sr):
+        embedding = encoder.embed_utterance(wav)
+    store = EmbeddingStore(EMBEDDING_STORE_DIR)
+    store.append(speaker_id, embedding, {"source": os.path.basename(combined_audio_file)})
+    print(f"Voice embedding for {speaker_id} saved in {EMBEDDING_STORE_DIR}")
 
-def main():
+def enroll(audio=None):
+    """Full enrollment; pass an audio_io.VirtualDevice holding archived takes to rerun it headlessly."""
     print("Starting the full process...")
     
     # 1. Record musical notes
-    record_all_notes()
+    record_all_notes(audio)
     
     # 2. Record spoken sentence
     sentence_path = os.path.join(RECORDINGS_DIR, "sentence.wav")
-    record_sentence(sentence_path)
+    record_sentence(sentence_path, audio=audio)
     
     # 3. Combine all audio
-    combine_audio()
+    combined = combine_audio()
     
-    # 4. Analyze and generate embedding
+    # 4. Analyze and generate embedding (straight from the combined array, no re-read)
     analyze_recordings()
-    generate_embedding()
+    generate_embedding(combined=combined)
     
     print("Process complete! Your combined voice embedding is ready.")
+    # Per-stage timings when run with VOCAL_TRACE=<file>
+    if instrumentation.is_enabled():
+        instrumentation.print_summary()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record the solfège notes and the sentence, then build the voice embedding.")
+    parser.add_argument("--replay", nargs="+", metavar="TAKE",
+                        help="Recorded takes to use instead of the microphone: the 7 notes, then the sentence")
+    args = parser.parse_args(argv)
+    enroll(audio_io.VirtualDevice(args.replay) if args.replay else None)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -10,10 +10,12 @@ SAVE_PATH = r"C:\Users\f\Desktop\chiara\2025\univ\MDP\VocalCorrection-App\upload
 if not os.path.exists(SAVE_PATH):
     os.makedirs(SAVE_PATH)
 
-def record_audio(filename, duration, samplerate=44100):
+def record_audio(filename, duration, samplerate=44100, audio=None):
+    # audio: anything with sounddevice's rec()/wait(), e.g. an audio_io.VirtualDevice replaying a take
+    audio = audio or sd
     print(f"Recording for {duration} seconds...")
-    recording = sd.rec(int(duration * samplerate), samplerate=samplerate, channels=2, dtype='int16')
-    sd.wait()  # Wait until recording is finished
+    recording = audio.rec(int(duration * samplerate), samplerate=samplerate, channels=2, dtype='int16')
+    audio.wait()  # Wait until recording is finished
 
     filepath = os.path.join(SAVE_PATH, filename + ".wav")
 
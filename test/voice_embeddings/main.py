@@ -27,6 +27,15 @@ recording_files = {note: os.path.join(RECORDINGS_DIR, f"user_{note}.wav") for no
 combined_audio_file = os.path.join(RECORDINGS_DIR, "combined_solfeggio2.wav")
 embedding_file = os.path.join(RECORDINGS_DIR, "solfeggio_embedding2.npy")
 
+_encoder = None
+
+def get_encoder():
+    """Load the VoiceEncoder once and reuse it for every embedding."""
+    global _encoder
+    if _encoder is None:
+        _encoder = VoiceEncoder()
+    return _encoder
+
 def record_note(note, filename, duration=3, samplerate=44100):
     """Record a single solfège note and save it to a file."""
     print(f"Recording {note}... Please sing now!")
@@ -105,7 +114,7 @@ def generate_embedding():
     print("Generating voice embedding...")
     # Load the combined audio at 16kHz (as expected by resemblyzer)
     wav, sr = librosa.load(combined_audio_file, sr=16000)
-    encoder = VoiceEncoder()
+    encoder = get_encoder()
     embedding = encoder.embed_utterance(wav)
     np.save(embedding_file, embedding)
     print(f"Voice embedding saved as {embedding_file}")
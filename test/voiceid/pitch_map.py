@@ -20,6 +20,17 @@ combined_audio_path = os.path.join(RECORDINGS_DIR, "combined_solfeggio.wav")
 embedding_path = os.path.join(RECORDINGS_DIR, "solfeggio_embedding.npy")
 
 
+_encoder = None
+
+
+def get_encoder():
+    """Load the VoiceEncoder once and reuse it for every embedding."""
+    global _encoder
+    if _encoder is None:
+        _encoder = VoiceEncoder()
+    return _encoder
+
+
 def record_note(syllable, filename, duration=3, samplerate=44100):
     """Records a single solfège note"""
     print(f"🎙️ Recording {syllable}... Sing now!")
@@ -95,7 +106,7 @@ def generate_embedding():
 
     print("🔄 Generating voice embedding...")
     wav, sr = librosa.load(combined_audio_path, sr=16000)
-    encoder = VoiceEncoder()
+    encoder = get_encoder()
     embedding = encoder.embed_utterance(wav)
 
     np.save(embedding_path, embedding)